@@ -0,0 +1,120 @@
+"""
+Trigger engine throughput on a replayed tick stream
+
+Registers triggers around each ticker's first replayed price, replays
+synthetic quotes (or a recorded tick file via --ticks) through
+MarketTrigger and reports quotes per second, triggers covered per second
+(the triggers on each quoted ticker, all resolved by a few bisections
+rather than visited one by one) and callback latency percentiles.
+--min-quotes-per-sec, --min-covered-per-sec and --max-p99-ms make it a
+regression gate: the exit status is 1 when any is missed.
+
+    python -m benchmarks.trigger_throughput --triggers 100000
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from src.analytics.trigger_engine import MarketTrigger
+from src.data_connectors.price_sources import ReplayPriceSource, read_ticks, synthetic_ticks, write_ticks
+
+
+def add_triggers(engine: MarketTrigger, first_prices: Dict[str, float], count: int, callback, seed: int) -> None:
+    """Spread ``count`` triggers over the tickers: 40% above, 40% below, 20% percent_change"""
+    rng = np.random.default_rng(seed)
+    tickers = list(first_prices)
+    picks = rng.integers(len(tickers), size=count)
+    kinds = rng.random(count)
+    offsets = rng.normal(0.0, 0.01, size=count)
+    moves = rng.uniform(0.001, 0.01, size=count)
+    for pick, kind, offset, move in zip(picks, kinds, offsets, moves):
+        ticker = tickers[pick]
+        if kind < 0.8:
+            condition = 'above' if kind < 0.4 else 'below'
+            engine.add_trigger(ticker, first_prices[ticker] * (1 + offset), condition, callback)
+        else:
+            engine.add_trigger(ticker, move, 'percent_change', callback)
+
+
+async def run_benchmark(path: Path, triggers: int, speed, seed: int) -> Dict[str, float]:
+    ticks = read_ticks(path)
+    first_prices = ticks.drop_duplicates('ticker').set_index('ticker')['price'].to_dict()
+    latencies: List[float] = []
+
+    async def on_fire(event):
+        latencies.append(time.monotonic() - event['received_at'])
+
+    engine = MarketTrigger(source=ReplayPriceSource(path, speed=speed))
+    add_triggers(engine, first_prices, triggers, on_fire, seed)
+
+    started = time.perf_counter()
+    await engine.start()
+    elapsed = time.perf_counter() - started
+    await engine.drain()
+    engine.stop()
+
+    stats = engine.stats()
+    latency_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'triggers': stats['triggers'],
+        'tickers': len(first_prices),
+        'quotes': stats['quotes'],
+        'fired': stats['fired'],
+        'seconds': elapsed,
+        'covered_per_sec': stats['triggers_covered'] / elapsed,
+        'quotes_per_sec': stats['quotes'] / elapsed,
+        'p50_ms': float(np.percentile(latency_ms, 50)),
+        'p95_ms': float(np.percentile(latency_ms, 95)),
+        'p99_ms': float(np.percentile(latency_ms, 99)),
+        'max_ms': float(latency_ms.max())
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--triggers', type=int, default=100000)
+    parser.add_argument('--tickers', type=int, default=500, help='synthetic tickers (ignored with --ticks)')
+    parser.add_argument('--steps', type=int, default=200, help='synthetic quotes per ticker (ignored with --ticks)')
+    parser.add_argument('--ticks', type=Path, help='recorded tick file (.arrow or .csv) to replay instead')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='replay speed multiple; as fast as possible when omitted')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-quotes-per-sec', type=float, help='fail below this quote rate')
+    parser.add_argument('--min-covered-per-sec', type=float, help='fail below this triggers-covered rate')
+    parser.add_argument('--max-p99-ms', type=float, help='fail above this p99 callback latency')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.ticks
+        if path is None:
+            path = Path(tmp) / 'ticks.arrow'
+            tickers = [f"T{i:04d}" for i in range(args.tickers)]
+            write_ticks(synthetic_ticks(tickers, args.steps, seed=args.seed), path)
+        result = asyncio.run(run_benchmark(path, args.triggers, args.speed, args.seed))
+
+    print(f"{result['triggers']} triggers on {result['tickers']} tickers, "
+          f"{result['quotes']} quotes in {result['seconds']:.2f}s, {result['fired']} fired")
+    print(f"quotes/sec: {result['quotes_per_sec']:,.0f}  triggers covered/sec: {result['covered_per_sec']:,.0f}")
+    print(f"callback latency ms: p50 {result['p50_ms']:.3f}  p95 {result['p95_ms']:.3f}  "
+          f"p99 {result['p99_ms']:.3f}  max {result['max_ms']:.3f}")
+
+    failures = []
+    if args.min_quotes_per_sec is not None and result['quotes_per_sec'] < args.min_quotes_per_sec:
+        failures.append(f"quotes/sec {result['quotes_per_sec']:,.0f} < {args.min_quotes_per_sec:,.0f}")
+    if args.min_covered_per_sec is not None and result['covered_per_sec'] < args.min_covered_per_sec:
+        failures.append(f"triggers covered/sec {result['covered_per_sec']:,.0f} < {args.min_covered_per_sec:,.0f}")
+    if args.max_p99_ms is not None and result['p99_ms'] > args.max_p99_ms:
+        failures.append(f"p99 callback latency {result['p99_ms']:.3f}ms > {args.max_p99_ms:.3f}ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import numpy as np
+from scipy.stats import chi2
+
+BENFORD_FIRST_DIGIT = np.log10(1 + 1 / np.arange(1, 10))
+BENFORD_FIRST_TWO_DIGITS = np.log10(1 + 1 / np.arange(10, 100))
+
+# Nigrini's MAD bounds for close, acceptable and marginal conformity
+MAD_THRESHOLDS = {
+    1: (0.006, 0.012, 0.015),
+    2: (0.0012, 0.0018, 0.0022)
+}
+
+# Powers of ten indexed by decimal exponent + _POW10_OFFSET
+_POW10_OFFSET = 330
+with np.errstate(over='ignore'):
+    _POW10 = 10.0 ** np.arange(-_POW10_OFFSET, 311)
+
+
+def leading_digits(values, n_digits: int = 1) -> np.ndarray:
+    """
+    Leading ``n_digits`` digits of every non-zero finite value as integers
+
+    Uses floor(|x| / 10**(floor(log10|x|) - n_digits + 1)) over the whole
+    array, so values below 1 and very large magnitudes work like any other.
+    """
+    x = np.abs(np.asarray(values, dtype=np.float64).ravel())
+    x = x[np.isfinite(x) & (x >= np.finfo(np.float64).tiny)]
+    low, high = 10 ** (n_digits - 1), 10 ** n_digits
+
+    shift = np.floor(np.log10(x)).astype(np.int64) + (_POW10_OFFSET - n_digits + 1)
+    digits = (x / _POW10[shift]).astype(np.int64)
+
+    # log10 can land one decade off right next to a power of ten; fix those few
+    off = (digits < low) | (digits >= high)
+    if off.any():
+        x_off = x[off]
+        exponent = shift[off] + (n_digits - 1)
+        exponent += x_off >= _POW10[exponent + 1]
+        exponent -= x_off < _POW10[exponent]
+        digits[off] = np.clip((x_off / _POW10[exponent - n_digits + 1]).astype(np.int64), low, high - 1)
+
+    return digits
+
+
+def benford_statistics(counts, n_digits: int = 1) -> dict:
+    """Goodness-of-fit statistics for first-digit (1) or first-two-digit (2) counts"""
+    expected = BENFORD_FIRST_DIGIT if n_digits == 1 else BENFORD_FIRST_TWO_DIGITS
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    observed = counts / total if total else np.zeros_like(expected)
+
+    chi_square = float(total * np.sum((observed - expected) ** 2 / expected))
+    mad = float(np.mean(np.abs(observed - expected)))
+    ks = float(np.max(np.abs(np.cumsum(observed) - np.cumsum(expected))))
+
+    close, acceptable, marginal = MAD_THRESHOLDS[n_digits]
+    if mad <= close:
+        conformity = 'close'
+    elif mad <= acceptable:
+        conformity = 'acceptable'
+    elif mad <= marginal:
+        conformity = 'marginal'
+    else:
+        conformity = 'nonconformity'
+
+    return {
+        'count': total,
+        'observed': observed,
+        'expected': expected,
+        'chi_square': chi_square,
+        'p_value': float(chi2.sf(chi_square, expected.size - 1)),
+        'mad': mad,
+        'mad_conformity': conformity,
+        'ks': ks,
+        'ks_critical': 1.36 / np.sqrt(total) if total else float('nan')  # 95% level
+    }
+
+
+class BenfordAccumulator:
+    """First and first-two digit counts accumulated over any number of chunks"""
+
+    def __init__(self):
+        self.first_digit_counts = np.zeros(9, dtype=np.int64)
+        self.first_two_digit_counts = np.zeros(90, dtype=np.int64)
+
+    def update(self, values) -> 'BenfordAccumulator':
+        """Count the leading digits of a chunk of values"""
+        counts = np.bincount(leading_digits(values, n_digits=2) - 10, minlength=90)
+        self.first_two_digit_counts += counts
+        # The first digit is the tens digit of the first-two-digit bucket
+        self.first_digit_counts += counts.reshape(9, 10).sum(axis=1)
+        return self
+
+    def merge(self, other: 'BenfordAccumulator') -> 'BenfordAccumulator':
+        self.first_digit_counts += other.first_digit_counts
+        self.first_two_digit_counts += other.first_two_digit_counts
+        return self
+
+    def result(self) -> dict:
+        return {
+            'first_digit': benford_statistics(self.first_digit_counts, n_digits=1),
+            'first_two_digits': benford_statistics(self.first_two_digit_counts, n_digits=2)
+        }
+
+
+def benford_test(values, chunk_size: int = 2**22) -> dict:
+    """Run the first and first-two digit tests over an array, chunked to bound temporaries"""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    accumulator = BenfordAccumulator()
+    for start in range(0, values.size, chunk_size):
+        accumulator.update(values[start:start + chunk_size])
+    return accumulator.result()
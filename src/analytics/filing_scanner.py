@@ -0,0 +1,101 @@
+import mmap
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+from src.analytics.benford import BenfordAccumulator
+
+SEC_FILINGS_DIR = Path("data/sec_filings")
+NUMBER_PATTERN = re.compile(rb'\d+\.\d+')
+_NUMBER_BYTES = frozenset(b'0123456789.')
+
+
+def _hash64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer over the bit patterns of float64 values"""
+    bits = np.ascontiguousarray(values + 0.0, dtype=np.float64).view(np.uint64)  # -0.0 -> 0.0
+    z = bits + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class DistinctCounter:
+    """K-minimum-values sketch of distinct values; exact until k distinct values are seen"""
+
+    def __init__(self, k: int = 4096):
+        self.k = k
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def update(self, values) -> 'DistinctCounter':
+        hashes = _hash64(np.asarray(values, dtype=np.float64).ravel())
+        if self._hashes.size == self.k:
+            hashes = hashes[hashes < self._hashes[-1]]
+        self._hashes = np.union1d(self._hashes, hashes)[:self.k]
+        return self
+
+    def estimate(self) -> int:
+        if self._hashes.size < self.k:
+            return int(self._hashes.size)
+        kth_smallest = float(self._hashes[-1]) / 2.0**64
+        return int(round((self.k - 1) / kth_smallest))
+
+
+def _chunk_end(buffer, start: int, end: int, size: int) -> int:
+    """Move a chunk boundary off any run of digits and dots so no number is split"""
+    if end >= size:
+        return size
+    boundary = end
+    while boundary > start and buffer[boundary - 1] in _NUMBER_BYTES:
+        boundary -= 1
+    if boundary > start:
+        return boundary
+    # The run fills the whole chunk, so end the chunk after it instead
+    boundary = end
+    while boundary < size and buffer[boundary] in _NUMBER_BYTES:
+        boundary += 1
+    return boundary
+
+
+def scan_buffer(buffer, chunk_size: int = 16 * 2**20) -> dict:
+    """
+    Stream decimal numbers out of a bytes-like buffer in chunks
+
+    Matches feed Benford digit counts and a distinct-value sketch directly,
+    so only one chunk's numbers exist at a time.
+    """
+    benford = BenfordAccumulator()
+    distinct = DistinctCounter()
+    numbers_count = 0
+    size = len(buffer)
+    start = 0
+
+    while start < size:
+        end = _chunk_end(buffer, start, start + chunk_size, size)
+        matches = NUMBER_PATTERN.findall(buffer, start, end)
+        if matches:
+            values = np.fromiter(map(float, matches), dtype=np.float64, count=len(matches))
+            numbers_count += values.size
+            benford.update(values)
+            distinct.update(values)
+        start = end
+
+    return {
+        'benford': benford.result(),
+        'numbers_count': numbers_count,
+        'unique_numbers': distinct.estimate()
+    }
+
+
+def scan_filing(path, chunk_size: int = 16 * 2**20) -> dict:
+    """Memory-map a filing and stream it through scan_buffer; relative names resolve under data/sec_filings"""
+    path = Path(path)
+    if not path.is_absolute() and not path.exists():
+        path = SEC_FILINGS_DIR / path
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return scan_buffer(b'', chunk_size)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return scan_buffer(buffer, chunk_size)
@@ -2,37 +2,42 @@ import numpy as np
 import pandas as pd
 from typing import Dict
 
+from src.analytics.benford import BENFORD_FIRST_DIGIT, benford_test
+from src.analytics.filing_scanner import scan_buffer, scan_filing
+
 class ForensicAnalyzer:
     def __init__(self):
-        self.benford_dist = np.log10(1 + 1/np.arange(1, 10))
+        self.benford_dist = BENFORD_FIRST_DIGIT
     
     def benfords_law_test(self, numbers: pd.Series) -> Dict:
-        counts = np.zeros(9)
-        valid = numbers.dropna()[numbers > 0]
-        
-        for num in valid:
-            first_digit = int(str(abs(num))[0])  # Get first non-zero digit
-            if 1 <= first_digit <= 9:
-                counts[first_digit-1] += 1
-        
-        total = counts.sum()
-        observed = counts / total
-        chi2 = np.sum((observed - self.benford_dist)**2 / self.benford_dist)
-        
+        values = np.asarray(numbers, dtype=np.float64)
+        return self._benford_summary(benford_test(values[values > 0])['first_digit'])
+    
+    def analyze_filing(self, filing_text: str) -> Dict:
+        return self._filing_summary(scan_buffer(filing_text.encode()))
+    
+    def analyze_filing_file(self, path, chunk_size: int = 16 * 2**20) -> Dict:
+        """Like analyze_filing, but memory-maps the filing and streams it in chunks"""
+        return self._filing_summary(scan_filing(path, chunk_size))
+    
+    def _filing_summary(self, scan: Dict) -> Dict:
         return {
-            "expected_distribution": self.benford_dist.tolist(),
-            "observed_distribution": observed.tolist(),
-            "chi_squared": chi2,
-            "anomaly_score": chi2 * 100
+            "benford_test": self._benford_summary(scan['benford']['first_digit']),
+            "numbers_count": scan['numbers_count'],
+            "unique_numbers": scan['unique_numbers']
         }
     
-    def analyze_filing(self, filing_text: str) -> Dict:
-        from collections import Counter
-        import re
+    def _benford_summary(self, first_digit: Dict) -> Dict:
+        # Squared distance between the distributions, the basis of the historical score
+        distance = first_digit['chi_square'] / first_digit['count'] if first_digit['count'] else np.nan
         
-        numbers = [float(x) for x in re.findall(r'\d+\.\d+', filing_text)]
         return {
-            "benford_test": self.benfords_law_test(pd.Series(numbers)),
-            "numbers_count": len(numbers),
-            "unique_numbers": len(set(numbers))
+            "expected_distribution": self.benford_dist.tolist(),
+            "observed_distribution": first_digit['observed'].tolist(),
+            "chi_squared": first_digit['chi_square'],
+            "p_value": first_digit['p_value'],
+            "mad": first_digit['mad'],
+            "mad_conformity": first_digit['mad_conformity'],
+            "ks_statistic": first_digit['ks'],
+            "anomaly_score": distance * 100
         }
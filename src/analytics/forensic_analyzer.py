@@ -1,5 +1,9 @@
 import numpy as np
-from collections import Counter
+
+from src.analytics.benford import benford_test
+from src.analytics.rolling import (
+    MAD_TO_STD, SlidingWindowStats, rolling_mean_std, rolling_median_mad
+)
 
 class ForensicAnalyzer:
     def __init__(self):
@@ -10,31 +14,93 @@ class ForensicAnalyzer:
 
     def benford_analysis(self, financial_data):
         """Applies Benford's Law analysis to financial statements"""
-        first_digits = [int(str(abs(float(x)))[0]) for x in financial_data if float(x) != 0]
-        digit_counts = Counter(first_digits)
-        total = len(first_digits)
+        first_digit = benford_test(np.asarray(financial_data, dtype=np.float64))['first_digit']
         
-        observed_dist = {d: count/total for d, count in digit_counts.items()}
-        chi_square = sum(
-            ((observed_dist.get(d, 0) - expected)**2) / expected 
-            for d, expected in self.benford_reference.items()
-        )
+        observed_dist = {
+            digit: float(share)
+            for digit, share in zip(self.benford_reference, first_digit['observed'])
+            if share > 0
+        }
         
         return {
             'observed_distribution': observed_dist,
             'expected_distribution': self.benford_reference,
-            'chi_square_stat': chi_square,
+            'chi_square_stat': first_digit['chi_square'],
+            'p_value': first_digit['p_value'],
+            'mad': first_digit['mad'],
+            'mad_conformity': first_digit['mad_conformity'],
+            'ks_stat': first_digit['ks'],
             'suspicious_threshold': 15.51  # 95% confidence level with 8 degrees of freedom
         }
 
-    def detect_anomalies(self, time_series_data, window=20):
-        """Detects anomalies in financial time series using rolling statistics"""
-        rolling_mean = np.mean(time_series_data)
-        rolling_std = np.std(time_series_data)
-        z_scores = (time_series_data - rolling_mean) / rolling_std
-        
+    def detect_anomalies(self, time_series_data, window=20, threshold=3.0, method='zscore'):
+        """
+        Detects anomalies in financial time series using rolling statistics
+
+        Each observation is scored against the ``window`` observations before
+        it. ``method='robust'`` uses the rolling median and scaled MAD instead
+        of mean and std. Accepts a single series or a (dates x tickers) panel;
+        for panels ``anomalies`` holds (row, column) pairs.
+        """
+        data = np.asarray(time_series_data, dtype=np.float64)
+        if method == 'robust':
+            center, spread = rolling_median_mad(data, window)
+            spread = spread * MAD_TO_STD
+        elif method == 'zscore':
+            center, spread = rolling_mean_std(data, window)
+        else:
+            raise ValueError(f"Unknown anomaly method '{method}'")
+
+        # Score row t against the window that ends at row t - 1
+        prior_center = np.full(data.shape, np.nan)
+        prior_spread = np.full(data.shape, np.nan)
+        prior_center[1:] = center[:-1]
+        prior_spread[1:] = spread[:-1]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = (data - prior_center) / prior_spread
+        severity = np.abs(z_scores)
+        flagged = np.nan_to_num(severity, nan=0.0) > threshold
+
+        return {
+            'anomalies': np.where(flagged)[0] if data.ndim == 1 else np.argwhere(flagged),
+            'z_scores': z_scores,
+            'severity': severity
+        }
+
+
+class RollingAnomalyDetector:
+    """
+    Streaming counterpart of ForensicAnalyzer.detect_anomalies (zscore method)
+
+    Each update scores the new bar of every series against the preceding
+    window, then slides the window, in O(1) per series.
+    """
+
+    def __init__(self, n_series, window=20, threshold=3.0):
+        self.threshold = threshold
+        self._stats = SlidingWindowStats(n_series, window)
+
+    @classmethod
+    def from_history(cls, time_series_data, window=20, threshold=3.0):
+        """Seed the window from the tail of a series or (dates x tickers) panel"""
+        data = np.asarray(time_series_data, dtype=np.float64)
+        data = data[:, None] if data.ndim == 1 else data
+        detector = cls(data.shape[1], window, threshold)
+        for row in data[-window:]:
+            detector._stats.update(row)
+        return detector
+
+    def update(self, values):
+        """Score one new observation per series and add it to the window"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = (values - self._stats.mean) / self._stats.std
+        self._stats.update(values)
+        severity = np.abs(z_scores)
+
         return {
-            'anomalies': np.where(abs(z_scores) > 3)[0],  # 3 sigma threshold
+            'anomalies': np.where(np.nan_to_num(severity, nan=0.0) > self.threshold)[0],
             'z_scores': z_scores,
-            'severity': abs(z_scores)
-        }
\ No newline at end of file
+            'severity': severity
+        }
@@ -0,0 +1,262 @@
+import numpy as np
+from scipy.signal import lfilter
+
+from src.analytics.rolling import rolling_sum
+
+TRADING_DAYS = 252
+
+
+def _forward_fill(panel: np.ndarray) -> np.ndarray:
+    """Carry the last valid value over interior gaps; leading gaps stay NaN"""
+    rows = np.where(np.isfinite(panel), np.arange(panel.shape[0])[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(panel, rows, axis=0)
+
+
+def _smooth(values: np.ndarray, alpha: float, seed: np.ndarray) -> np.ndarray:
+    """Exponential smoothing y_t = y_{t-1} + alpha * (x_t - y_{t-1}) down each column, starting from seed"""
+    smoothed, _ = lfilter([alpha], [1, alpha - 1], values, axis=0, zi=(1 - alpha) * seed[None, :])
+    return smoothed
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    """EMA seeded with the first value (pandas ewm(span, adjust=False))"""
+    if values.shape[0] == 0:
+        return values.copy()
+    return _smooth(values, 2 / (span + 1), values[0])
+
+
+def _wilder_rsi(closes: np.ndarray, period: int) -> np.ndarray:
+    """Wilder RSI: averages seeded with a simple mean of the first ``period`` moves"""
+    rsi = np.full(closes.shape, np.nan)
+    if closes.shape[0] <= period:
+        return rsi
+
+    delta = np.diff(closes, axis=0)
+    gains = np.maximum(delta, 0.0)
+    losses = np.maximum(-delta, 0.0)
+
+    alpha = 1 / period
+    avg_gain = np.empty((closes.shape[0] - period,) + closes.shape[1:])
+    avg_loss = np.empty_like(avg_gain)
+    avg_gain[0] = gains[:period].mean(axis=0)
+    avg_loss[0] = losses[:period].mean(axis=0)
+    avg_gain[1:] = _smooth(gains[period:], alpha, avg_gain[0])
+    avg_loss[1:] = _smooth(losses[period:], alpha, avg_loss[0])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[period:] = 100 - 100 / (1 + avg_gain / avg_loss)
+    return rsi
+
+
+def compute_indicators(closes, sma_windows=(50, 200), rsi_period=14, ema_spans=(12, 26), signal_span=9,
+                       volatility_window=TRADING_DAYS) -> dict:
+    """
+    Technical indicators for every column of a (dates x tickers) close panel
+
+    Returns (dates x tickers) arrays for ``sma_<w>``, ``ema_<span>``, ``rsi``,
+    ``macd``, ``macd_signal`` and ``returns``, plus per-ticker annualized
+    ``volatility`` of the last ``volatility_window`` returns. SMAs come from cumulative sums; EMAs, MACD and Wilder
+    RSI from linear filters over all tickers at once. Interior gaps are
+    forward-filled; tickers whose history starts later are computed from
+    their first valid close, with NaN before it.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    closes = _forward_fill(closes[:, None] if closes.ndim == 1 else closes)
+    n_dates, n_tickers = closes.shape
+    fast_span, slow_span = ema_spans
+
+    indicators = {}
+    for window in sma_windows:
+        sums, counts = rolling_sum(closes, window)
+        indicators[f'sma_{window}'] = np.where(counts == window, sums / window, np.nan)
+
+    for name in [f'ema_{fast_span}', f'ema_{slow_span}', 'rsi', 'macd', 'macd_signal']:
+        indicators[name] = np.full((n_dates, n_tickers), np.nan)
+
+    # Recursive indicators run once per distinct history start
+    has_data = np.isfinite(closes)
+    starts = np.where(has_data.any(axis=0), has_data.argmax(axis=0), -1)
+    for start in np.unique(starts[starts >= 0]):
+        columns = np.flatnonzero(starts == start)
+        history = closes[start:, columns]
+        fast = _ema(history, fast_span)
+        slow = _ema(history, slow_span)
+        macd = fast - slow
+        indicators[f'ema_{fast_span}'][start:, columns] = fast
+        indicators[f'ema_{slow_span}'][start:, columns] = slow
+        indicators['macd'][start:, columns] = macd
+        indicators['macd_signal'][start:, columns] = _ema(macd, signal_span)
+        indicators['rsi'][start:, columns] = _wilder_rsi(history, rsi_period)
+
+    returns = np.full((n_dates, n_tickers), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[1:] = closes[1:] / closes[:-1] - 1
+    indicators['returns'] = returns
+
+    recent = returns[-volatility_window:]
+    valid = np.isfinite(recent)
+    n_returns = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_return = np.where(valid, recent, 0.0).sum(axis=0) / n_returns
+        squares = np.where(valid, recent - mean_return, 0.0) ** 2
+        variance = squares.sum(axis=0) / (n_returns - 1)
+    indicators['volatility'] = np.where(n_returns > 1, np.sqrt(variance) * np.sqrt(TRADING_DAYS), np.nan)
+
+    return indicators
+
+
+class IndicatorState:
+    """
+    Running indicator state for one ticker that absorbs each new bar in O(1)
+
+    Holds a ring buffer of recent closes with running sums for every SMA
+    window, Wilder-smoothed average gain/loss, EMA/MACD levels, and a ring
+    buffer of the last ``volatility_window`` returns with running sums of
+    the returns and their squares. ``snapshot()`` matches compute_indicators
+    over the same bars. ``amend()`` replaces the latest bar, e.g. when an
+    intraday bar is revised.
+    """
+
+    def __init__(self, sma_windows=(50, 200), rsi_period=14, ema_spans=(12, 26), signal_span=9,
+                 volatility_window=TRADING_DAYS):
+        self.sma_windows = tuple(sma_windows)
+        self.rsi_period = rsi_period
+        self.ema_spans = tuple(ema_spans)
+        self.signal_span = signal_span
+        self._buffer = np.zeros(max(self.sma_windows))
+        self._position = 0
+        self._sums = {window: 0.0 for window in self.sma_windows}
+        self.count = 0
+        self.last_close = None
+        self.last_volume = None
+        self.last_timestamp = None
+        self._ema_fast = self._ema_slow = self._signal = None
+        self._moves = 0
+        self._gain_sum = self._loss_sum = 0.0
+        self._avg_gain = self._avg_loss = None
+        self._returns = np.zeros(volatility_window)
+        self._return_position = 0
+        self._return_count = 0
+        self._return_sum = self._return_squares = 0.0
+        self._undo = None
+
+    @classmethod
+    def from_history(cls, closes, volumes=None, timestamps=None, **params) -> 'IndicatorState':
+        """Build the state by replaying a close history once"""
+        state = cls(**params)
+        n_bars = len(closes)
+        volumes = [None] * n_bars if volumes is None else volumes
+        timestamps = [None] * n_bars if timestamps is None else timestamps
+        for i, (close, volume, timestamp) in enumerate(zip(closes, volumes, timestamps)):
+            # Only the final bar can be amended, so only it needs an undo record
+            if i == n_bars - 1:
+                state.append(close, volume, timestamp)
+            else:
+                state._advance(float(close), volume, timestamp)
+        return state
+
+    def append(self, close, volume=None, timestamp=None) -> 'IndicatorState':
+        """Advance every indicator by one bar"""
+        close = float(close)
+        scalars = {k: v for k, v in self.__dict__.items() if k not in ('_buffer', '_returns')}
+        scalars['_sums'] = dict(self._sums)
+        self._undo = (scalars, self._buffer[self._position], self._returns[self._return_position])
+        return self._advance(close, volume, timestamp)
+
+    def _advance(self, close: float, volume, timestamp) -> 'IndicatorState':
+        capacity = self._buffer.size
+        for window in self.sma_windows:
+            self._sums[window] += close
+            if self.count >= window:
+                self._sums[window] -= self._buffer[(self._position - window) % capacity]
+        self._buffer[self._position] = close
+        self._position = (self._position + 1) % capacity
+        if self._position == 0:
+            # Re-derive the running sums once per lap so rounding error cannot build up
+            for window in self.sma_windows:
+                if self.count + 1 >= window:
+                    self._sums[window] = float(self._buffer[capacity - window:].sum())
+
+        if self.last_close is None:
+            self._ema_fast = self._ema_slow = close
+            self._signal = 0.0
+        else:
+            self._update_rsi(close - self.last_close)
+            self._update_returns(close / self.last_close - 1)
+            fast_span, slow_span = self.ema_spans
+            self._ema_fast += 2 / (fast_span + 1) * (close - self._ema_fast)
+            self._ema_slow += 2 / (slow_span + 1) * (close - self._ema_slow)
+            self._signal += 2 / (self.signal_span + 1) * (self._ema_fast - self._ema_slow - self._signal)
+
+        self.count += 1
+        self.last_close = close
+        self.last_volume = None if volume is None else int(volume)
+        self.last_timestamp = timestamp
+        return self
+
+    def amend(self, close, volume=None, timestamp=None) -> 'IndicatorState':
+        """Replace the most recent bar instead of adding a new one"""
+        if self._undo is None:
+            raise ValueError("No bar to amend")
+        scalars, overwritten, overwritten_return = self._undo
+        self.__dict__.update(scalars)
+        self._buffer[self._position] = overwritten
+        self._returns[self._return_position] = overwritten_return
+        return self.append(close, volume, timestamp)
+
+    def snapshot(self) -> dict:
+        """Latest value of every indicator; None where not enough bars have been seen"""
+        fast_span, slow_span = self.ema_spans
+        snapshot = {
+            'latest_price': self.last_close,
+            'latest_volume': self.last_volume
+        }
+        for window in self.sma_windows:
+            snapshot[f'sma_{window}'] = float(self._sums[window] / window) if self.count >= window else None
+        snapshot['rsi'] = self._rsi()
+        n_returns = min(self._return_count, self._returns.size)
+        if n_returns > 1:
+            variance = max((self._return_squares - self._return_sum ** 2 / n_returns) / (n_returns - 1), 0.0)
+            snapshot['volatility'] = float(np.sqrt(variance * TRADING_DAYS))
+        else:
+            snapshot['volatility'] = None
+        snapshot['macd'] = None if self.last_close is None else self._ema_fast - self._ema_slow
+        snapshot['macd_signal'] = self._signal
+        return snapshot
+
+    def _update_rsi(self, delta):
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self._moves += 1
+        if self._moves <= self.rsi_period:
+            self._gain_sum += gain
+            self._loss_sum += loss
+            if self._moves == self.rsi_period:
+                self._avg_gain = self._gain_sum / self.rsi_period
+                self._avg_loss = self._loss_sum / self.rsi_period
+        else:
+            self._avg_gain += (gain - self._avg_gain) / self.rsi_period
+            self._avg_loss += (loss - self._avg_loss) / self.rsi_period
+
+    def _rsi(self):
+        if self._avg_gain is None or (self._avg_gain == 0 and self._avg_loss == 0):
+            return None
+        if self._avg_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + self._avg_gain / self._avg_loss)
+
+    def _update_returns(self, value):
+        capacity = self._returns.size
+        if self._return_count >= capacity:
+            dropped = self._returns[self._return_position]
+            self._return_sum -= dropped
+            self._return_squares -= dropped * dropped
+        self._returns[self._return_position] = value
+        self._return_sum += value
+        self._return_squares += value * value
+        self._return_position = (self._return_position + 1) % capacity
+        self._return_count += 1
+        if self._return_position == 0:
+            # Re-derive the running sums once per lap so rounding error cannot build up
+            self._return_sum = float(self._returns.sum())
+            self._return_squares = float(np.dot(self._returns, self._returns))
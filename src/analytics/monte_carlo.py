@@ -0,0 +1,165 @@
+import warnings
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+SAMPLING_MODES = ('random', 'antithetic', 'sobol')
+
+# Two-sided 95% normal quantile used for confidence intervals of the mean
+Z_95 = float(norm.ppf(0.975))
+
+
+class NormalSampler:
+    """Standard normal draws with optional antithetic or scrambled Sobol sampling"""
+
+    def __init__(self, dims: int, sampling: str = 'random', seed=None):
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode '{sampling}', expected one of {SAMPLING_MODES}")
+        self.dims = dims
+        self.sampling = sampling
+        self.rng = np.random.default_rng(seed)
+        self._sobol = qmc.Sobol(d=dims, scramble=True, seed=self.rng) if sampling == 'sobol' else None
+
+    def draw(self, n_paths: int, leading: tuple = ()) -> np.ndarray:
+        """
+        Draw ``leading + (n_paths, dims)`` normals
+
+        Antithetic draws pair path i with path i + ceil(n_paths / 2). Sobol
+        points are shared across the leading axes (common random numbers) and
+        come back with singleton leading dimensions that broadcast.
+        """
+        if self.sampling == 'sobol':
+            with warnings.catch_warnings():
+                # Only the final, truncated block of a run is not a power of two
+                warnings.filterwarnings('ignore', message='.*balance properties.*')
+                uniforms = self._sobol.random(n_paths)
+            eps = np.finfo(np.float64).eps
+            normals = norm.ppf(np.clip(uniforms, eps, 1 - eps))
+            return normals.reshape((1,) * len(leading) + normals.shape)
+
+        if self.sampling == 'antithetic':
+            half = self.rng.standard_normal(leading + ((n_paths + 1) // 2, self.dims))
+            return np.concatenate([half, -half], axis=-2)[..., :n_paths, :]
+
+        return self.rng.standard_normal(leading + (n_paths, self.dims))
+
+    def estimator_units(self, values: np.ndarray) -> np.ndarray:
+        """Independent units for standard-error estimates (antithetic pairs are averaged)"""
+        if self.sampling != 'antithetic':
+            return values
+        n_paths = values.shape[-1]
+        half = (n_paths + 1) // 2
+        paired = (values[..., :n_paths - half] + values[..., half:]) / 2
+        return np.concatenate([paired, values[..., n_paths - half:half]], axis=-1)
+
+
+def block_schedule(first_block: int, max_block: int):
+    """
+    Yield simulation block sizes first, first, 2*first, 4*first, ... capped at max_block
+
+    With power-of-two arguments every block starts on a multiple of its own size,
+    which keeps Sobol blocks balanced.
+    """
+    yield first_block
+    block = first_block
+    while True:
+        yield block
+        block = min(2 * block, max_block)
+
+
+def ci_converged(mean, std, n_units, target_ci_width):
+    """Whether the 95% CI of the mean is narrower than target_ci_width relative to the mean"""
+    width = 2 * Z_95 * std / np.sqrt(np.maximum(n_units, 1))
+    return (n_units > 1) & (width <= target_ci_width * np.abs(mean))
+
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations updated chunk by chunk"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values) -> 'RunningMoments':
+        """Fold a chunk of values into the running moments"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size:
+            chunk_mean = values.mean()
+            self._merge_moments(values.size, chunk_mean, np.sum((values - chunk_mean) ** 2))
+        return self
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        """Combine moments gathered independently (e.g. by another worker)"""
+        self._merge_moments(other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float('nan')
+
+    def _merge_moments(self, n, mean, m2):
+        # Parallel variance update (Chan et al.)
+        if n == 0:
+            return
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+
+class SimulationStats(RunningMoments):
+    """Running moments and a bounded quantile sketch for streamed simulation output"""
+
+    def __init__(self, sketch_size: int = 20000):
+        super().__init__()
+        self.sketch_size = sketch_size
+        self._values = np.empty(0)
+        self._weights = np.empty(0)
+
+    def update(self, values) -> 'SimulationStats':
+        """Fold a chunk of simulated values into the running statistics"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        super().update(values)
+        self._add_to_sketch(np.sort(values), np.ones(values.size))
+        return self
+
+    def merge(self, other: 'SimulationStats') -> 'SimulationStats':
+        """Combine statistics gathered independently (e.g. by another worker)"""
+        super().merge(other)
+        self._add_to_sketch(other._values, other._weights)
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile(s), exact while fewer than sketch_size values were seen"""
+        positions = np.cumsum(self._weights) - (self._weights + 1) / 2
+        return np.interp(np.asarray(q) * (self.count - 1), positions, self._values)
+
+    def summary(self) -> dict:
+        ci_lower, median, ci_upper = self.quantile([0.025, 0.5, 0.975])
+        return {
+            'mean': float(self.mean),
+            'std': self.std,
+            'ci_lower': float(ci_lower),
+            'ci_upper': float(ci_upper),
+            'median': float(median),
+            'n_paths': self.count
+        }
+
+    def _add_to_sketch(self, values, weights):
+        values = np.concatenate([self._values, values])
+        weights = np.concatenate([self._weights, weights])
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+
+        if values.size > self.sketch_size:
+            # Resample to sketch_size points of equal weight at evenly spaced ranks
+            total = weights.sum()
+            block = total / self.sketch_size
+            positions = np.cumsum(weights) - (weights + 1) / 2
+            targets = np.arange(self.sketch_size) * block + (block - 1) / 2
+            values = np.interp(targets, positions, values)
+            weights = np.full(self.sketch_size, block)
+
+        self._values, self._weights = values, weights
@@ -1,63 +1,107 @@
 from multiprocessing import Pool
+import os
 import numpy as np
 import pandas as pd
 from numpy import nan
 import logging
 
+from itertools import repeat
+
+from src.analytics.monte_carlo import (
+    NormalSampler, RunningMoments, SimulationStats, block_schedule, ci_converged
+)
+
 logger = logging.getLogger(__name__)
 
+def _simulate_npvs(normals, latest_fcf, mu, sigma, discount, terminal_factor):
+    """Simulate NPVs from a (paths, years) block of standard normals; discount[i] is the factor for year i"""
+    paths = latest_fcf * np.cumprod(1 + mu + sigma * normals, axis=1)
+    terminal = paths[:, -1] * terminal_factor
+    return latest_fcf + paths @ discount[1:] + terminal * discount[-1]
+
+def _simulate_into_stats(sampler, n_paths, chunk_size, params, target_ci_width=None, first_block=None) -> SimulationStats:
+    """
+    Simulate up to n_paths in blocks, keeping only running statistics
+
+    With ``target_ci_width`` blocks grow geometrically from ``first_block`` and
+    the run stops as soon as the mean is estimated to that relative precision.
+    """
+    stats = SimulationStats()
+    precision = RunningMoments()
+    blocks = block_schedule(first_block, chunk_size) if target_ci_width else repeat(chunk_size)
+
+    for block in blocks:
+        block = min(block, n_paths - stats.count)
+        if block <= 0:
+            break
+        npvs = _simulate_npvs(sampler.draw(block), **params)
+        stats.update(npvs)
+        if target_ci_width:
+            precision.update(sampler.estimator_units(npvs))
+            if ci_converged(precision.mean, precision.std, precision.count, target_ci_width):
+                break
+    return stats
+
+def _run_shard(task) -> SimulationStats:
+    """Process-pool entry point: simulate one shard on its own RNG stream"""
+    params, n_paths, seed_sequence, chunk_size, sampling = task
+    sampler = NormalSampler(params['discount'].size - 1, sampling, seed_sequence)
+    return _simulate_into_stats(sampler, n_paths, chunk_size, params)
+
 class ValuationEngine:
     def __init__(self):
         self.risk_free_rate = 0.03  # 3% risk-free rate
         self.market_risk_premium = 0.06  # 6% market risk premium
+        self.projection_years = 5
+        self.terminal_growth = 0.02  # 2% perpetual growth
+        self.chunk_size = 2**17  # Paths simulated per block for large runs
+        self.first_block = 2**12  # Initial block when stopping on a target precision
+        
+    def _dcf_parameters(self, cash_flows: pd.Series, years: int = None) -> dict:
+        """Derive the simulation inputs from historical free cash flows"""
+        # Convert to numpy array and drop any NaN values
+        historical_fcf = cash_flows.dropna().values
         
-    def _calculate_npv(self, cash_flows, discount_rate):
-        """Calculate NPV manually since numpy.npv is not available"""
-        return sum(cf / (1 + discount_rate)**i for i, cf in enumerate(cash_flows))
+        if len(historical_fcf) < 2:
+            raise ValueError("Insufficient cash flow data for analysis")
         
-    def monte_carlo_dcf(self, cash_flows: pd.Series, n_simulations: int = 1000):
+        # Calculate growth rates
+        growth_rates = np.diff(historical_fcf) / historical_fcf[:-1]
+        discount_rate = self.risk_free_rate + self.market_risk_premium
+        years = years or self.projection_years
+        
+        return {
+            'latest_fcf': float(historical_fcf[-1]),
+            'mu': float(growth_rates.mean()),
+            'sigma': float(growth_rates.std()),
+            'discount': (1 + discount_rate) ** -np.arange(years + 1),
+            # Gordon Growth terminal value as a multiple of the final year's cash flow
+            'terminal_factor': (1 + self.terminal_growth) / (discount_rate - self.terminal_growth)
+        }
+        
+    def monte_carlo_dcf(self, cash_flows: pd.Series, n_simulations: int = 1000, seed=None,
+                        sampling: str = 'random', target_ci_width: float = None):
         """
         Perform Monte Carlo DCF valuation
+
+        Paths are simulated in blocks of ``chunk_size``; runs larger than one
+        block are folded into running statistics so memory stays flat.
+        Pass ``seed`` for reproducible results. ``sampling`` is 'random',
+        'antithetic' or 'sobol'. With ``target_ci_width`` (relative width of
+        the 95% CI of the mean, e.g. 0.01) the run stops once that precision
+        is reached and ``n_simulations`` becomes the path budget; ``n_paths``
+        in the result reports how many paths were used.
         """
         try:
-            # Convert to numpy array and drop any NaN values
-            historical_fcf = cash_flows.dropna().values
-            
-            if len(historical_fcf) < 2:
-                raise ValueError("Insufficient cash flow data for analysis")
-            
-            # Calculate growth rates
-            growth_rates = np.diff(historical_fcf) / historical_fcf[:-1]
-            mu = growth_rates.mean()
-            sigma = growth_rates.std()
-            
-            # Project future cash flows
-            latest_fcf = historical_fcf[-1]
-            years = 5
-            discount_rate = self.risk_free_rate + self.market_risk_premium
+            params = self._dcf_parameters(cash_flows)
+            sampler = NormalSampler(params['discount'].size - 1, sampling, seed)
             
-            npvs = []
-            for _ in range(n_simulations):
-                # Generate random growth rates
-                sim_growth_rates = np.random.normal(mu, sigma, years)
-                
-                # Calculate future cash flows
-                future_fcf = latest_fcf
-                sim_cash_flows = [future_fcf]
-                for g in sim_growth_rates:
-                    future_fcf *= (1 + g)
-                    sim_cash_flows.append(future_fcf)
-                
-                # Terminal value (Gordon Growth Model)
-                terminal_growth = 0.02  # 2% perpetual growth
-                terminal_value = sim_cash_flows[-1] * (1 + terminal_growth) / (discount_rate - terminal_growth)
-                sim_cash_flows[-1] += terminal_value
-                
-                # Calculate NPV
-                npv = self._calculate_npv(sim_cash_flows, discount_rate)
-                npvs.append(npv)
+            if target_ci_width is None and n_simulations <= self.chunk_size:
+                return self._analyze_results(_simulate_npvs(sampler.draw(n_simulations), **params))
             
-            return self._analyze_results(npvs)
+            return _simulate_into_stats(
+                sampler, n_simulations, self.chunk_size, params, target_ci_width, self.first_block
+            ).summary()
             
         except Exception as e:
             logger.error(f"Error in Monte Carlo DCF: {str(e)}")
@@ -70,20 +114,70 @@ class ValuationEngine:
             'std': float(np.std(npvs)),
             'ci_lower': float(np.percentile(npvs, 2.5)),
             'ci_upper': float(np.percentile(npvs, 97.5)),
-            'median': float(np.median(npvs))
+            'median': float(np.median(npvs)),
+            'n_paths': len(npvs)
         }
 
 class ParallelValuationEngine(ValuationEngine):
-    def _run_single_simulation(self, args):
-        mu, sigma, years = args
-        trial = np.random.normal(mu, sigma, years)
-        return np.npv(0.1, trial)
-
-    def monte_carlo_dcf(self, cash_flows: pd.Series, years: int = 5, simulations: int = 10000):
-        mu, sigma = cash_flows.mean(), cash_flows.std()
-        with Pool() as pool:
-            npvs = pool.map(
-                self._run_single_simulation,
-                [(mu, sigma, years)] * simulations
-            )
-        return self._analyze_results(npvs)
+    """Monte Carlo DCF sharded across a process pool that lives as long as the engine"""
+
+    def __init__(self, processes: int = None, shards_per_process: int = 4):
+        super().__init__()
+        self.processes = processes or os.cpu_count() or 1
+        self.shards_per_process = shards_per_process  # >1 evens out stragglers
+        self.min_parallel_paths = 200_000  # Smaller runs are cheaper inline
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = Pool(processes=self.processes)
+        return self._pool
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def monte_carlo_dcf(self, cash_flows: pd.Series, years: int = 5, simulations: int = 10000, seed=None,
+                        sampling: str = 'random'):
+        """
+        Perform Monte Carlo DCF valuation across worker processes
+
+        Each shard simulates a batch of paths on its own SeedSequence-spawned
+        stream and returns partial moments and a quantile sketch, which are
+        merged here. Results depend only on ``seed`` and the shard count.
+        Sobol shards use independent scrambles (randomized QMC); early
+        stopping is left to the single-process engine.
+        """
+        try:
+            params = self._dcf_parameters(cash_flows, years)
+            n_shards = max(1, min(self.processes * self.shards_per_process, simulations // self.chunk_size))
+            shard_sizes = np.full(n_shards, simulations // n_shards)
+            shard_sizes[:simulations % n_shards] += 1
+            streams = np.random.SeedSequence(seed).spawn(n_shards)
+            tasks = [
+                (params, int(n_paths), stream, self.chunk_size, sampling)
+                for n_paths, stream in zip(shard_sizes, streams)
+            ]
+
+            if simulations < self.min_parallel_paths or self.processes == 1:
+                partials = map(_run_shard, tasks)
+            else:
+                partials = self._get_pool().imap(_run_shard, tasks)
+
+            stats = SimulationStats()
+            for partial in partials:
+                stats.merge(partial)
+            return stats.summary()
+
+        except Exception as e:
+            logger.error(f"Error in parallel Monte Carlo DCF: {str(e)}")
+            raise
@@ -1,44 +1,136 @@
 import numpy as np
 from scipy.stats import norm
 
+from src.analytics.monte_carlo import NormalSampler, RunningMoments, block_schedule, ci_converged
+
 class QuantitativeAnalysis:
     def __init__(self):
         self.risk_free_rate = 0.035  # Updated periodically
         self.market_risk_premium = 0.06
-        
-    def monte_carlo_dcf(self, cash_flows, growth_rates, beta, simulations=10000):
+        self.terminal_multiple = 15  # Industry average P/E
+        self.max_batch_bytes = 256 * 2**20  # Memory budget for one simulation tensor
+        self.first_block = 2**10  # Initial block when stopping on a target precision
+
+    def monte_carlo_dcf(self, cash_flows, growth_rates, beta, simulations=10000, seed=None,
+                        sampling='random', target_ci_width=None):
         """Monte Carlo simulation for DCF valuation"""
-        terminal_multiple = 15  # Industry average P/E
-        
-        # Generate random growth scenarios
-        growth_scenarios = np.random.normal(
-            loc=np.mean(growth_rates),
-            scale=np.std(growth_rates),
-            size=(simulations, len(cash_flows))
+        batch = self.monte_carlo_dcf_batch(
+            np.asarray(cash_flows, dtype=np.float64)[None, :],
+            np.asarray(growth_rates, dtype=np.float64)[None, :],
+            [beta],
+            simulations=simulations,
+            seed=seed,
+            sampling=sampling,
+            target_ci_width=target_ci_width
         )
-        
+
+        return {
+            'mean_valuation': batch['mean_valuation'][0],
+            'std_valuation': batch['std_valuation'][0],
+            'confidence_interval': tuple(batch['confidence_interval'][0]),
+            'scenarios': {
+                case: values[0] for case, values in batch['scenarios'].items()
+            },
+            'n_paths': int(batch['n_paths'][0])
+        }
+
+    def monte_carlo_dcf_batch(self, cash_flows, growth_rates, betas, simulations=10000, seed=None,
+                              sampling='random', target_ci_width=None):
+        """
+        Monte Carlo DCF valuation for N tickers at once
+
+        ``cash_flows`` is an (N, years) array, ``growth_rates`` an (N, k) array of
+        historical growth observations (NaN-padded if ragged) and ``betas`` has
+        length N. Every scenario for a block of tickers is evaluated as one
+        (tickers, simulations, years) tensor; blocks are sized to stay within
+        ``max_batch_bytes``. Results are arrays aligned with the ticker axis.
+
+        ``sampling`` is 'random', 'antithetic' or 'sobol' (Sobol points are
+        shared across tickers). With ``target_ci_width`` (relative width of the
+        95% CI of the mean) each ticker stops drawing once it is that precise;
+        ``simulations`` is then the per-ticker budget and ``n_paths`` reports
+        how many paths each ticker used.
+        """
+        cash_flows = np.atleast_2d(np.asarray(cash_flows, dtype=np.float64))
+        growth_rates = np.atleast_2d(np.asarray(growth_rates, dtype=np.float64))
+        betas = np.asarray(betas, dtype=np.float64).reshape(-1)
+        n_tickers, years = cash_flows.shape
+
+        if growth_rates.shape[0] != n_tickers or betas.size != n_tickers:
+            raise ValueError("cash_flows, growth_rates and betas must have one row per ticker")
+
+        growth_mean = np.nanmean(growth_rates, axis=1)
+        growth_std = np.nanstd(growth_rates, axis=1)
+
         # Calculate cost of equity using CAPM
-        cost_of_equity = self.risk_free_rate + beta * self.market_risk_premium
-        
-        valuations = []
-        for scenario in growth_scenarios:
-            projected_cash_flows = cash_flows * (1 + scenario)
-            terminal_value = (projected_cash_flows[-1] * (1 + scenario[-1])) * terminal_multiple
-            
-            # Discount cash flows
-            discount_factors = 1 / (1 + cost_of_equity) ** np.arange(1, len(cash_flows) + 1)
-            present_value = sum(projected_cash_flows * discount_factors)
-            terminal_present_value = terminal_value * discount_factors[-1]
-            
-            valuations.append(present_value + terminal_present_value)
-            
+        cost_of_equity = self.risk_free_rate + betas * self.market_risk_premium
+        discount_factors = (1 + cost_of_equity[:, None]) ** -np.arange(1, years + 1)
+
+        # Growth draws, scenarios and projected cash flows dominate memory use
+        bytes_per_ticker = 3 * simulations * years * np.dtype(np.float64).itemsize
+        block = max(1, int(self.max_batch_bytes // bytes_per_ticker))
+
+        sampler = NormalSampler(years, sampling, seed)
+        mean = np.empty(n_tickers)
+        std = np.empty(n_tickers)
+        percentiles = np.empty((3, n_tickers))
+        n_paths = np.zeros(n_tickers, dtype=np.int64)
+
+        def valuations_for(rows, size):
+            # Generate random growth scenarios
+            scenarios = sampler.draw(size, (rows.size,)) * growth_std[rows, None, None]
+            scenarios += growth_mean[rows, None, None] + 1
+
+            projected = cash_flows[rows, None, :] * scenarios
+            present_value = np.einsum('nsy,ny->ns', projected, discount_factors[rows])
+            terminal_value = projected[..., -1] * scenarios[..., -1] * self.terminal_multiple
+            return present_value + terminal_value * discount_factors[rows, -1:]
+
+        for start in range(0, n_tickers, block):
+            rows = np.arange(start, min(start + block, n_tickers))
+
+            if target_ci_width is None:
+                valuations = valuations_for(rows, simulations)
+                mean[rows] = valuations.mean(axis=1)
+                std[rows] = valuations.std(axis=1)
+                percentiles[:, rows] = np.percentile(valuations, [90, 50, 10], axis=1)
+                n_paths[rows] = simulations
+                continue
+
+            # Keep simulating only the tickers whose mean is not yet precise enough
+            samples = {row: [] for row in rows}
+            precision = {row: RunningMoments() for row in rows}
+            active, done = rows, 0
+            for size in block_schedule(min(self.first_block, simulations), simulations):
+                size = min(size, simulations - done)
+                if size <= 0 or active.size == 0:
+                    break
+                valuations = valuations_for(active, size)
+                units = sampler.estimator_units(valuations)
+                still_active = []
+                for row, row_values, row_units in zip(active, valuations, units):
+                    samples[row].append(row_values)
+                    moments = precision[row].update(row_units)
+                    if not ci_converged(moments.mean, moments.std, moments.count, target_ci_width):
+                        still_active.append(row)
+                active = np.array(still_active, dtype=np.int64)
+                done += size
+
+            for row, chunks in samples.items():
+                values = np.concatenate(chunks)
+                mean[row] = values.mean()
+                std[row] = values.std()
+                percentiles[:, row] = np.percentile(values, [90, 50, 10])
+                n_paths[row] = values.size
+
         return {
-            'mean_valuation': np.mean(valuations),
-            'std_valuation': np.std(valuations),
-            'confidence_interval': norm.interval(0.95, np.mean(valuations), np.std(valuations)),
+            'mean_valuation': mean,
+            'std_valuation': std,
+            'confidence_interval': np.column_stack(norm.interval(0.95, mean, std)),
             'scenarios': {
-                'bull_case': np.percentile(valuations, 90),
-                'base_case': np.percentile(valuations, 50),
-                'bear_case': np.percentile(valuations, 10)
-            }
-        }
\ No newline at end of file
+                'bull_case': percentiles[0],
+                'base_case': percentiles[1],
+                'bear_case': percentiles[2]
+            },
+            'n_paths': n_paths
+        }
@@ -1,6 +1,8 @@
 import numpy as np
-from scipy.optimize import minimize
+from scipy import sparse
+from scipy.optimize import linprog
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 class RiskEngine:
     def __init__(self):
@@ -21,36 +23,229 @@ class RiskEngine:
             'confidence_level': self.confidence_level
         }
     
+    def rolling_cvar(self, returns, window=252, max_chunk_bytes=64 * 2**20):
+        """
+        VaR and CVaR over trailing windows for every date and ticker
+
+        ``returns`` is a (dates x tickers) panel. Each window's percentile is
+        found with np.partition on a strided view, processed in date chunks of
+        at most ``max_chunk_bytes``. Rows before the first full window, and
+        windows containing NaN, are NaN. DataFrame input gives DataFrame output.
+        """
+        panel = np.asarray(returns, dtype=np.float64)
+        if panel.ndim == 1:
+            panel = panel[:, None]
+        n_dates, n_tickers = panel.shape
+        var = np.full((n_dates, n_tickers), np.nan)
+        cvar = np.full((n_dates, n_tickers), np.nan)
+
+        if n_dates >= window:
+            low, high, frac = _percentile_position(window, 1 - self.confidence_level)
+            windows = sliding_window_view(panel, window, axis=0)  # (n_windows, tickers, window)
+            missing = sliding_window_view(np.isnan(panel), window, axis=0).any(axis=-1)
+            chunk = max(1, max_chunk_bytes // (n_tickers * window * panel.itemsize))
+
+            for start in range(0, windows.shape[0], chunk):
+                block = np.partition(windows[start:start + chunk], [low, high], axis=-1)
+                block_var = block[..., low] + frac * (block[..., high] - block[..., low])
+                in_tail = block <= block_var[..., None]
+                block_cvar = np.where(in_tail, block, 0).sum(axis=-1) / in_tail.sum(axis=-1)
+
+                rows = slice(window - 1 + start, window - 1 + start + block.shape[0])
+                var[rows] = np.where(missing[start:start + chunk], np.nan, block_var)
+                cvar[rows] = np.where(missing[start:start + chunk], np.nan, block_cvar)
+
+        if isinstance(returns, pd.DataFrame):
+            var = pd.DataFrame(var, index=returns.index, columns=returns.columns)
+            cvar = pd.DataFrame(cvar, index=returns.index, columns=returns.columns)
+        elif np.ndim(returns) == 1:
+            var, cvar = var[:, 0], cvar[:, 0]
+
+        return {
+            'VaR': var,
+            'CVaR': cvar,
+            'confidence_level': self.confidence_level
+        }
+
     def optimize_portfolio(self, returns, target_return=None):
         """Portfolio optimization using CVaR as risk measure"""
-        n_assets = returns.shape[1]
-        
-        def objective(weights):
-            return -self.calculate_cvar(returns, weights)['CVaR']
-        
-        constraints = [
-            {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}  # weights sum to 1
-        ]
-        
-        if target_return is not None:
-            constraints.append({
-                'type': 'eq',
-                'fun': lambda x: np.sum(returns.mean() * x) - target_return
-            })
-            
-        bounds = tuple((0, 1) for _ in range(n_assets))
-        
-        result = minimize(
-            objective,
-            x0=np.ones(n_assets) / n_assets,
-            method='SLSQP',
-            bounds=bounds,
-            constraints=constraints
+        return self._solve_cvar_lp(self._build_cvar_lp(returns), target_return)
+
+    def efficient_frontier(self, returns, n_points=20, target_returns=None):
+        """
+        Sweep target returns and solve the CVaR LP for each
+
+        The constraint matrix is assembled once and only the target-return
+        bound changes between solves. Targets default to an even grid between
+        the lowest and highest mean asset return.
+        """
+        problem = self._build_cvar_lp(returns)
+        if target_returns is None:
+            target_returns = np.linspace(problem['mean_returns'].min(), problem['mean_returns'].max(), n_points)
+
+        frontier = []
+        for target in np.sort(np.asarray(target_returns, dtype=np.float64)):
+            result = self._solve_cvar_lp(problem, target)
+            result['target_return'] = float(target)
+            frontier.append(result)
+        return frontier
+
+    def _build_cvar_lp(self, returns):
+        """
+        Rockafellar-Uryasev LP over variables [weights, VaR level alpha, scenario excess losses u]
+
+        minimize alpha + sum(u) / ((1 - confidence) * S)
+        subject to u_s >= -r_s . w - alpha, u >= 0, sum(w) = 1, 0 <= w <= 1
+        """
+        scenarios = np.asarray(returns, dtype=np.float64)
+        n_scenarios, n_assets = scenarios.shape
+        mean_returns = scenarios.mean(axis=0)
+
+        cost = np.concatenate([
+            np.zeros(n_assets),
+            [1.0],
+            np.full(n_scenarios, 1 / ((1 - self.confidence_level) * n_scenarios))
+        ])
+        # -r_s . w - alpha - u_s <= 0
+        a_ub = sparse.hstack([
+            sparse.csr_matrix(-scenarios),
+            sparse.csr_matrix(-np.ones((n_scenarios, 1))),
+            -sparse.identity(n_scenarios, format='csr')
+        ], format='csc')
+        # Budget row, then the target-return row
+        a_eq = sparse.csr_matrix(np.vstack([
+            np.concatenate([np.ones(n_assets), np.zeros(n_scenarios + 1)]),
+            np.concatenate([mean_returns, np.zeros(n_scenarios + 1)])
+        ]))
+        bounds = [(0, 1)] * n_assets + [(None, None)] + [(0, None)] * n_scenarios
+
+        return {
+            'n_assets': n_assets,
+            'mean_returns': mean_returns,
+            'c': cost,
+            'A_ub': a_ub,
+            'b_ub': np.zeros(n_scenarios),
+            'A_eq': a_eq,
+            'bounds': bounds
+        }
+
+    def _solve_cvar_lp(self, problem, target_return=None):
+        n_assets = problem['n_assets']
+        if target_return is None:
+            a_eq, b_eq = problem['A_eq'][:1], np.array([1.0])
+        else:
+            a_eq, b_eq = problem['A_eq'], np.array([1.0, target_return])
+
+        result = linprog(
+            problem['c'],
+            A_ub=problem['A_ub'],
+            b_ub=problem['b_ub'],
+            A_eq=a_eq,
+            b_eq=b_eq,
+            bounds=problem['bounds'],
+            method='highs'
         )
-        
+
+        if result.x is None:
+            weights = np.full(n_assets, np.nan)
+            cvar = np.nan
+        else:
+            weights = result.x[:n_assets]
+            # The LP minimizes expected tail loss; report it as a tail return like calculate_cvar
+            cvar = -result.fun
+
         return {
-            'optimal_weights': result.x,
-            'optimized_cvar': -result.fun,
+            'optimal_weights': weights,
+            'optimized_cvar': cvar,
             'success': result.success,
             'message': result.message
         }
+
+
+def _percentile_position(window, q):
+    """Order statistics and weight matching np.percentile's linear interpolation"""
+    position = (window - 1) * q
+    low = int(np.floor(position))
+    return low, min(low + 1, window - 1), position - low
+
+
+class RollingRiskMonitor:
+    """
+    Per-ticker VaR/CVaR over a sliding window, maintained bar by bar
+
+    Each ticker's window is kept sorted. An update removes the value leaving
+    the window and inserts the new one in O(window) vectorized work, with no
+    re-sort. Results are NaN until the window has filled.
+    """
+
+    def __init__(self, n_tickers, window=252, confidence_level=0.95):
+        if window < 2:
+            raise ValueError("window must hold at least two observations")
+        self.window = window
+        self.confidence_level = confidence_level
+        self.count = 0
+        self._position = 0
+        self._ring = np.empty((window, n_tickers))
+        self._sorted = None
+        self._low, self._high, self._frac = _percentile_position(window, 1 - confidence_level)
+
+    @classmethod
+    def from_history(cls, returns, window=252, confidence_level=0.95):
+        """Seed a monitor with the trailing window of a (dates x tickers) return panel"""
+        panel = np.asarray(returns, dtype=np.float64)
+        if panel.ndim == 1:
+            panel = panel[:, None]
+        monitor = cls(panel.shape[1], window, confidence_level)
+        for row in panel[-window:]:
+            monitor.update(row)
+        return monitor
+
+    def update(self, new_returns):
+        """Slide every ticker's window forward by one bar and return the current VaR/CVaR"""
+        new_returns = np.asarray(new_returns, dtype=np.float64).reshape(-1)
+        if not np.isfinite(new_returns).all():
+            raise ValueError("Rolling risk updates require finite returns")
+
+        leaving = self._ring[self._position].copy()
+        self._ring[self._position] = new_returns
+        self._position = (self._position + 1) % self.window
+
+        if self.count < self.window:
+            self.count += 1
+            if self.count == self.window:
+                self._sorted = np.sort(self._ring.T, axis=1)
+            return self.current()
+
+        n_tickers, window = self._sorted.shape
+        tickers = np.arange(n_tickers)
+
+        # Drop the leaving value from each sorted row
+        keep = np.ones((n_tickers, window), dtype=bool)
+        keep[tickers, (self._sorted < leaving[:, None]).sum(axis=1)] = False
+        remaining = self._sorted[keep].reshape(n_tickers, window - 1)
+
+        # Insert the new value at its rank
+        rank = (remaining < new_returns[:, None]).sum(axis=1)
+        slots = np.arange(window)[None, :]
+        source = np.clip(np.where(slots < rank[:, None], slots, slots - 1), 0, window - 2)
+        self._sorted = np.take_along_axis(remaining, source, axis=1)
+        self._sorted[tickers, rank] = new_returns
+
+        return self.current()
+
+    def current(self):
+        """VaR and CVaR of every ticker's current window"""
+        if self._sorted is None:
+            empty = np.full(self._ring.shape[1], np.nan)
+            return {'VaR': empty, 'CVaR': empty.copy(), 'confidence_level': self.confidence_level}
+
+        low, high = self._sorted[:, self._low], self._sorted[:, self._high]
+        var = low + self._frac * (high - low)
+        in_tail = self._sorted <= var[:, None]
+        cvar = np.where(in_tail, self._sorted, 0).sum(axis=1) / in_tail.sum(axis=1)
+
+        return {
+            'VaR': var,
+            'CVaR': cvar,
+            'confidence_level': self.confidence_level
+        }
@@ -0,0 +1,140 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Scales the median absolute deviation to a normal standard deviation
+MAD_TO_STD = 1.4826
+
+
+def _as_panel(values) -> np.ndarray:
+    panel = np.asarray(values, dtype=np.float64)
+    return panel[:, None] if panel.ndim == 1 else panel
+
+
+def _restore_shape(panel: np.ndarray, like) -> np.ndarray:
+    return panel[:, 0] if np.ndim(like) == 1 else panel
+
+
+def rolling_sum(values, window: int):
+    """
+    Trailing-window sums and valid-observation counts via cumulative sums
+
+    Works column-wise on a (dates x series) panel. Row t covers rows
+    t - window + 1 .. t; NaNs contribute nothing to the sum or count.
+    """
+    panel = _as_panel(values)
+    valid = np.isfinite(panel)
+    cumulative = np.zeros((panel.shape[0] + 1,) + panel.shape[1:])
+    np.cumsum(np.where(valid, panel, 0.0), axis=0, out=cumulative[1:])
+    counts = np.zeros_like(cumulative)
+    np.cumsum(valid, axis=0, out=counts[1:])
+
+    sums = np.full(panel.shape, np.nan)
+    window_counts = np.zeros(panel.shape)
+    if panel.shape[0] >= window:
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+        window_counts[window - 1:] = counts[window:] - counts[:-window]
+    return sums, window_counts
+
+
+def rolling_mean_std(values, window: int):
+    """
+    Trailing-window mean and population std for every column of a panel
+
+    Uses cumulative sums of column-centred values, so the cost is independent
+    of the window length. Windows that are not fully populated are NaN.
+    """
+    panel = _as_panel(values)
+    with np.errstate(invalid='ignore'):
+        # Centring keeps the sum-of-squares formula numerically stable
+        offset = np.nan_to_num(np.nanmean(panel, axis=0)) if panel.size else 0.0
+    centred = panel - offset
+
+    sums, counts = rolling_sum(centred, window)
+    squares, _ = rolling_sum(centred ** 2, window)
+    full = counts == window
+
+    mean = np.where(full, sums / window, np.nan)
+    variance = np.maximum(squares / window - mean ** 2, 0.0)
+    std = np.where(full, np.sqrt(variance), np.nan)
+    return _restore_shape(mean + offset, values), _restore_shape(std, values)
+
+
+def rolling_median_mad(values, window: int, max_chunk_bytes: int = 64 * 2**20):
+    """Trailing-window median and median absolute deviation for every column of a panel"""
+    panel = _as_panel(values)
+    median = np.full(panel.shape, np.nan)
+    mad = np.full(panel.shape, np.nan)
+
+    if panel.shape[0] >= window:
+        windows = sliding_window_view(panel, window, axis=0)  # (n_windows, series, window)
+        chunk = max(1, max_chunk_bytes // (panel.shape[1] * window * panel.itemsize))
+        for start in range(0, windows.shape[0], chunk):
+            block = windows[start:start + chunk]
+            block_median = np.median(block, axis=-1)
+            rows = slice(window - 1 + start, window - 1 + start + block.shape[0])
+            median[rows] = block_median
+            mad[rows] = np.median(np.abs(block - block_median[..., None]), axis=-1)
+
+    return _restore_shape(median, values), _restore_shape(mad, values)
+
+
+class SlidingWindowStats:
+    """
+    Mean and population std over the last ``window`` observations of many series
+
+    Welford-style add/remove updates make each new observation O(1) per
+    series, independent of the window length. As in rolling_mean_std, a
+    series whose window holds a non-finite observation reports NaN; once
+    that observation leaves the window, the series' sums are recomputed
+    from the window and the O(1) updates resume.
+    """
+
+    def __init__(self, n_series: int, window: int):
+        self.window = window
+        self.count = 0
+        self._position = 0
+        self._ring = np.zeros((window, n_series))
+        self._invalid = np.zeros(n_series, dtype=np.int64)
+        self._mean = np.zeros(n_series)
+        self._m2 = np.zeros(n_series)
+
+    @property
+    def mean(self) -> np.ndarray:
+        return np.where(self._invalid == 0, self._mean, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        if self.count < self.window:
+            return np.full(self._mean.shape, np.nan)
+        return np.where(self._invalid == 0, np.sqrt(np.maximum(self._m2, 0.0) / self.window), np.nan)
+
+    def update(self, values) -> 'SlidingWindowStats':
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        valid = np.isfinite(values)
+        leaving = self._ring[self._position].copy()
+        self._ring[self._position] = values
+        self._position = (self._position + 1) % self.window
+        # Non-finite values enter the sums as zeros; those series report NaN until recomputed
+        values = np.where(valid, values, 0.0)
+        self._invalid += ~valid
+
+        if self.count < self.window:
+            self.count += 1
+            delta = values - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (values - self._mean)
+            return self
+
+        leaving_invalid = ~np.isfinite(leaving)
+        self._invalid -= leaving_invalid
+        leaving = np.where(leaving_invalid, 0.0, leaving)
+        previous_mean = self._mean.copy()
+        self._mean += (values - leaving) / self.window
+        self._m2 += (values - leaving) * (values - self._mean + leaving - previous_mean)
+
+        recompute = leaving_invalid & (self._invalid == 0)
+        if recompute.any():
+            window_values = self._ring[:, recompute]
+            self._mean[recompute] = window_values.mean(axis=0)
+            self._m2[recompute] = ((window_values - self._mean[recompute]) ** 2).sum(axis=0)
+        return self
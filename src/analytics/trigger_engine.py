@@ -1,67 +1,229 @@
 import asyncio
+import bisect
+import inspect
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import numpy as np
+from typing import Any, Callable, Collection, Dict, List, Optional
+
+from src.data_connectors.price_sources import PriceSource, YahooPriceSource
+
+logger = logging.getLogger(__name__)
+
+CONDITIONS = ('above', 'below', 'percent_change')
+
+# Callbacks allowed to run at once
+CALLBACK_WORKERS = 64
+# Threads for plain (non-coroutine) callbacks, separate from the data access pool
+CALLBACK_THREADS = 8
+# Seconds a plain callback may take before it stops being awaited
+CALLBACK_TIMEOUT = 30.0
+
+
+class _ThresholdIndex:
+    """Thresholds of one ticker and condition kept sorted, with trigger ids in matching order"""
 
-class MarketTrigger:
     def __init__(self):
-        self.active_triggers = {}
+        self.thresholds: List[float] = []
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, threshold: float, trigger_id: int) -> None:
+        i = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(i, threshold)
+        self.ids.insert(i, trigger_id)
+
+    def remove(self, threshold: float, trigger_id: int) -> None:
+        i = bisect.bisect_left(self.thresholds, threshold)
+        i = self.ids.index(trigger_id, i)
+        del self.thresholds[i]
+        del self.ids[i]
+
+
+class MarketTrigger:
+    """
+    Price alerts evaluated against one stream of quote batches
+
+    Quotes come from a PriceSource: by default Yahoo, polled for every
+    watched ticker in batched requests, or a replayed tick file. Triggers
+    are edge-triggered: ``above`` fires when the price moves from at or
+    below its threshold to above it, ``below`` the reverse, and
+    ``percent_change`` when the move since the previous quote exceeds its
+    threshold (a fraction, e.g. 0.05). The first quote for a ticker counts
+    as a move from nowhere, so conditions that already hold fire once.
+    Thresholds are kept sorted per ticker and condition, so each quote
+    finds its crossed triggers with a few bisections. Fired events are
+    queued for a fixed set of callback workers; coroutine callbacks are
+    awaited by the worker and plain callables run on the engine's own
+    threads, so slow callbacks (e.g. webhooks) hold up neither evaluation
+    nor price and fundamentals I/O. Plain callables stop being awaited
+    after ``callback_timeout``; coroutine callbacks are awaited directly
+    (a timer per call halves throughput) and should bound their own I/O.
+    """
+
+    def __init__(self, source: Optional[PriceSource] = None, callback_workers: int = CALLBACK_WORKERS,
+                 callback_threads: int = CALLBACK_THREADS, callback_timeout: float = CALLBACK_TIMEOUT):
+        self.source = YahooPriceSource() if source is None else source
+        self.callback_workers = callback_workers
+        self.callback_timeout = callback_timeout
+        self._executor = ThreadPoolExecutor(max_workers=callback_threads, thread_name_prefix='trigger-callback')
+        self.active_triggers: Dict[int, Dict[str, Any]] = {}
+        self.last_prices: Dict[str, float] = {}
         self.running = False
-        
-    async def monitor_price(self, ticker, threshold, condition, callback):
-        """Monitor price movements and trigger alerts"""
-        while self.running:
+        self._indexes: Dict[str, Dict[str, _ThresholdIndex]] = {}
+        self._ids = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._stats = {'quotes': 0, 'triggers_covered': 0, 'fired': 0, 'callback_errors': 0, 'callback_timeouts': 0}
+
+    def add_trigger(self, ticker: str, threshold: float, condition: str, callback: Callable) -> int:
+        """Add a price trigger; returns its id for remove_trigger"""
+        if condition not in CONDITIONS:
+            raise ValueError(f"Unsupported trigger condition: {condition}")
+        trigger_id = next(self._ids)
+        self.active_triggers[trigger_id] = {
+            'ticker': ticker,
+            'threshold': float(threshold),
+            'condition': condition,
+            'callback': callback,
+            'is_async': inspect.iscoroutinefunction(callback)
+        }
+        indexes = self._indexes.setdefault(ticker, {})
+        indexes.setdefault(condition, _ThresholdIndex()).add(float(threshold), trigger_id)
+        return trigger_id
+
+    def remove_trigger(self, trigger_id: int) -> bool:
+        """Remove a trigger by id; returns whether it existed"""
+        trigger = self.active_triggers.pop(trigger_id, None)
+        if trigger is None:
+            return False
+        ticker, condition = trigger['ticker'], trigger['condition']
+        indexes = self._indexes[ticker]
+        indexes[condition].remove(trigger['threshold'], trigger_id)
+        if not indexes[condition]:
+            del indexes[condition]
+        if not indexes:
+            del self._indexes[ticker]
+            self.last_prices.pop(ticker, None)
+        return True
+
+    def evaluate(self, ticker: str, price: float) -> List[int]:
+        """Record a quote and return the ids of triggers it fires"""
+        previous = self.last_prices.get(ticker)
+        self.last_prices[ticker] = price
+        indexes = self._indexes.get(ticker)
+        if not indexes:
+            return []
+        self._stats['quotes'] += 1
+        # Every trigger on the ticker is resolved by the bisections below, without being visited
+        self._stats['triggers_covered'] += sum(len(index) for index in indexes.values())
+
+        fired = []
+        above = indexes.get('above')
+        if above is not None and (previous is None or price > previous):
+            lo = 0 if previous is None else bisect.bisect_left(above.thresholds, previous)
+            fired.extend(above.ids[lo:bisect.bisect_left(above.thresholds, price)])
+
+        below = indexes.get('below')
+        if below is not None and (previous is None or price < previous):
+            hi = len(below) if previous is None else bisect.bisect_right(below.thresholds, previous)
+            fired.extend(below.ids[bisect.bisect_right(below.thresholds, price):hi])
+
+        change = indexes.get('percent_change')
+        if change is not None and previous:
+            moved = abs(price - previous) / previous
+            fired.extend(change.ids[:bisect.bisect_left(change.thresholds, moved)])
+        return fired
+
+    def process_quotes(self, quotes: Dict[str, float]) -> int:
+        """Evaluate a batch of quotes and dispatch callbacks; returns the number fired"""
+        timestamp = datetime.now().isoformat()
+        received_at = time.monotonic()
+        count = 0
+        for ticker, price in quotes.items():
+            previous = self.last_prices.get(ticker)
+            for trigger_id in self.evaluate(ticker, price):
+                trigger = self.active_triggers[trigger_id]
+                self._dispatch(trigger, {
+                    'trigger_id': trigger_id,
+                    'ticker': ticker,
+                    'price': price,
+                    'previous_price': previous,
+                    'threshold': trigger['threshold'],
+                    'condition': trigger['condition'],
+                    'timestamp': timestamp,
+                    'received_at': received_at
+                })
+                count += 1
+        self._stats['fired'] += count
+        return count
+
+    def watched_tickers(self) -> Collection[str]:
+        """Tickers with at least one trigger"""
+        return self._indexes.keys()
+
+    def _dispatch(self, trigger: Dict[str, Any], event: Dict[str, Any]) -> None:
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._run_callbacks()) for _ in range(self.callback_workers)]
+        self._events.put_nowait((trigger, event))
+
+    async def _run_callbacks(self) -> None:
+        # A None item tells the worker to exit once everything queued before it has run
+        while (item := await self._events.get()) is not None:
+            trigger, event = item
             try:
-                current_price = await self._fetch_latest_price(ticker)
-                if self._evaluate_condition(current_price, threshold, condition):
-                    await callback({
-                        'ticker': ticker,
-                        'price': current_price,
-                        'threshold': threshold,
-                        'condition': condition,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                await asyncio.sleep(60)  # Check every minute
+                if trigger['is_async']:
+                    await trigger['callback'](event)
+                else:
+                    call = asyncio.get_running_loop().run_in_executor(self._executor, trigger['callback'], event)
+                    await asyncio.wait_for(call, self.callback_timeout)
+            except asyncio.TimeoutError:
+                self._stats['callback_timeouts'] += 1
+                logger.error(f"Trigger callback for {event['ticker']} timed out after {self.callback_timeout}s")
             except Exception as e:
-                print(f"Error monitoring {ticker}: {str(e)}")
-                
-    def _evaluate_condition(self, price, threshold, condition):
-        if condition == 'above':
-            return price > threshold
-        elif condition == 'below':
-            return price < threshold
-        elif condition == 'percent_change':
-            return abs(self.last_price[ticker] - price) / self.last_price[ticker] > threshold
-            
-    async def _fetch_latest_price(self, ticker):
-        """Fetch real-time price data"""
-        # Implementation depends on data source (e.g., Yahoo Finance, Alpha Vantage)
-        pass
-        
-    def add_trigger(self, ticker, threshold, condition, callback):
-        """Add new price trigger"""
-        if ticker not in self.active_triggers:
-            self.active_triggers[ticker] = []
-        self.active_triggers[ticker].append({
-            'threshold': threshold,
-            'condition': condition,
-            'callback': callback
-        })
-        
-    def start(self):
-        """Start monitoring all triggers"""
-        self.running = True
-        loop = asyncio.get_event_loop()
-        for ticker, triggers in self.active_triggers.items():
-            for trigger in triggers:
-                loop.create_task(
-                    self.monitor_price(
-                        ticker,
-                        trigger['threshold'],
-                        trigger['condition'],
-                        trigger['callback']
-                    )
-                )
-        
+                self._stats['callback_errors'] += 1
+                logger.error(f"Trigger callback failed for {event['ticker']}: {str(e)}")
+            finally:
+                self._events.task_done()
+        self._events.task_done()
+
+    async def run(self) -> None:
+        """Evaluate quote batches from the source until stopped or the source runs out"""
+        try:
+            async for quotes in self.source.stream(self.watched_tickers):
+                if not self.running:
+                    break
+                # Triggers removed while the batch was being fetched are skipped
+                self.process_quotes({t: p for t, p in quotes.items() if t in self._indexes})
+        finally:
+            self.running = False
+
+    async def drain(self) -> None:
+        """Wait for dispatched callbacks to finish"""
+        await self._events.join()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, triggers=len(self.active_triggers), pending_callbacks=self._events.qsize())
+
+    def start(self) -> asyncio.Task:
+        """Start evaluating quotes from the source on the running event loop"""
+        if self._task is None or self._task.done():
+            self.running = True
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
     def stop(self):
-        """Stop all monitoring"""
+        """Stop evaluating quotes; callbacks already dispatched run to completion"""
         self.running = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for _ in self._workers:
+            self._events.put_nowait(None)
+        self._workers = []
@@ -1,46 +1,91 @@
-from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
 import uvicorn
 import asyncio
+import hashlib
+import logging
 
 from src.analytics.quantitative_analysis import QuantitativeAnalysis
 from src.analytics.forensic_analyzer import ForensicAnalyzer
 from src.analytics.risk_engine import RiskEngine
 from ..errors import AnalysisError, DataSourceError, ValidationError
-from ..cache import analysis_cache
+from ..cache import response_cache
+from ..main import analyze_stock, get_cached_price_data, iter_bounded_analyses, refresh_price_data
+from ..serialization import dumps
+from .responses import NumpyJSONResponse
 
 app = FastAPI(title="AI Financial Analysis Agent")
+logger = logging.getLogger(__name__)
+
+# Analyses in flight per streaming batch request
+BATCH_CONCURRENCY = 16
 
 quant_analyzer = QuantitativeAnalysis()
 forensic_analyzer = ForensicAnalyzer()
 risk_engine = RiskEngine()
 
+class BatchAnalysisRequest(BaseModel):
+    tickers: List[str]
+    encoding: str = Field('json', pattern='^(json|columnar)$')
+    concurrency: int = Field(BATCH_CONCURRENCY, ge=1, le=64)
+
 class AnalysisRequest(BaseModel):
     ticker: str
     start_date: Optional[str] = None
     end_date: Optional[str] = None
     analysis_type: List[str] = ['all']
 
+def _price_etag(ticker: str, encoding: str, price_data) -> str:
+    """Weak ETag that changes whenever a new bar arrives or the latest bar is revised"""
+    latest = price_data.iloc[-1]
+    key = f"{ticker}|{encoding}|{len(price_data)}|{price_data.index[-1].isoformat()}|{latest['Close']!r}|{latest['Volume']!r}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # If-None-Match uses weak comparison
+    return '*' in candidates or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in candidates]
+
 @app.get("/api/analyze/{ticker}")
 async def analyze_stock_endpoint(
     ticker: str,
-    refresh_cache: bool = Query(False, description="Force refresh cached data")
+    refresh_cache: bool = Query(False, description="Force refresh cached data"),
+    encoding: str = Query('json', pattern='^(json|columnar)$', description="Price history encoding"),
+    if_none_match: Optional[str] = Header(None)
 ):
+    """
+    Analysis for one ticker, served from pre-serialized bytes while its prices are unchanged
+
+    Every request derives the ETag from the current prices (a price_cache
+    lookup on the hot path). A matching If-None-Match gets a 304, and the
+    serialized response is cached under the ETag, so a new or revised bar
+    is never answered with an older body. ``refresh_cache`` drops the
+    cached prices and makes the price store fetch newer bars first.
+    """
     try:
-        # Clear cache if requested
         if refresh_cache:
-            analysis_cache.clear_expired()
-        
-        result = await analyze_stock(ticker)
-        
-        if 'error' in result:
-            raise HTTPException(
-                status_code=400 if isinstance(result.get('error'), ValidationError) else 500,
-                detail=result
-            )
-            
-        return result
+            await refresh_price_data(ticker)
+
+        etag = _price_etag(ticker, encoding, await get_cached_price_data(ticker))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+        body = response_cache.get(etag)
+        if body is None:
+            result = await analyze_stock(ticker, encoding)
+            if 'error' in result:
+                raise HTTPException(
+                    status_code=400 if isinstance(result.get('error'), ValidationError) else 500,
+                    detail=result
+                )
+            body = dumps(result)
+            response_cache.set(etag, body)
+        return Response(content=body, media_type="application/json", headers=headers)
 
     except HTTPException:
         raise
@@ -67,11 +112,21 @@ async def analyze_stocks_batch(tickers: str):
     tasks = [analyze_stock(ticker) for ticker in ticker_list]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
-    return {
+    return NumpyJSONResponse({
         "batch_results": {
-            ticker: result for ticker, result in zip(ticker_list, results)
+            ticker: {'error': str(result), 'ticker': ticker} if isinstance(result, Exception) else result
+            for ticker, result in zip(ticker_list, results)
         }
-    }
+    })
+
+@app.post("/api/analyze/batch")
+async def analyze_batch_stream(request: BatchAnalysisRequest):
+    """Stream one NDJSON line per ticker as each analysis finishes; any number of tickers, bounded concurrency"""
+    async def lines():
+        async for result in iter_bounded_analyses(request.tickers, request.concurrency, request.encoding):
+            yield dumps(result) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 async def fetch_market_data(ticker: str):
     """Fetch required market data for analysis"""
@@ -6,8 +6,10 @@ from typing import List
 import json
 import asyncio
 import logging
+import time
 
-from src.main import analyze_stock, analyze_multiple_tickers
+from src.main import iter_analyses
+from src.serialization import PRICE_HISTORY_ENCODINGS, dumps
 
 app = FastAPI(title="Financial Analysis Dashboard")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -15,10 +17,82 @@ templates = Jinja2Templates(directory="templates")
 
 logger = logging.getLogger(__name__)
 
+# Tickers per bulk price download when streaming; small batches get the first results out sooner
+STREAM_BATCH_SIZE = 10
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+async def send_message(websocket: WebSocket, message: dict) -> None:
+    """Send a JSON text frame serialized by orjson, so NumPy arrays go out without conversion"""
+    await websocket.send_text(dumps(message).decode())
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+async def stream_analyses(websocket: WebSocket, tickers: List[str], encoding: str = 'json') -> None:
+    """
+    Send each ticker's results as soon as its analysis finishes
+
+    Per ticker, an ``analysis_metrics`` message with the small metrics block
+    goes out first and an ``analysis_history`` message with the price
+    history follows, in ``encoding`` (``json`` or ``columnar``).
+    ``analysis_complete`` closes the run with timings.
+    """
+    started = time.perf_counter()
+    timing = {"tickers": {}, "first_result_ms": None}
+    errors = 0
+
+    async for ticker, result in iter_analyses(tickers, batch_size=STREAM_BATCH_SIZE, encoding=encoding):
+        elapsed = _elapsed_ms(started)
+        timing["tickers"][ticker] = elapsed
+        if timing["first_result_ms"] is None:
+            timing["first_result_ms"] = elapsed
+
+        if 'error' in result:
+            errors += 1
+            await send_message(websocket, {
+                "type": "error",
+                "ticker": ticker,
+                "message": result['error']
+            })
+            continue
+
+        await send_message(websocket, {
+            "type": "analysis_metrics",
+            "ticker": ticker,
+            "elapsed_ms": elapsed,
+            "data": {
+                "metrics": {
+                    "latest_price": result["metrics"]["latest_price"],
+                    "volume": result["metrics"]["volume"],
+                    "market_cap": result["metrics"]["market_cap"],
+                    "technical": {
+                        "rsi": result["metrics"]["technical"]["rsi"],
+                        "sma_50": result["metrics"]["technical"]["sma_50"],
+                        "sma_200": result["metrics"]["technical"]["sma_200"],
+                        "volatility": result["metrics"]["technical"]["volatility"]
+                    }
+                }
+            }
+        })
+        await send_message(websocket, {
+            "type": "analysis_history",
+            "ticker": ticker,
+            "data": {
+                "price_history": result["price_history"]
+            }
+        })
+
+    timing["total_ms"] = _elapsed_ms(started)
+    await send_message(websocket, {
+        "type": "analysis_complete",
+        "count": len(timing["tickers"]),
+        "errors": errors,
+        "timing": timing
+    })
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
@@ -30,49 +104,18 @@ async def websocket_endpoint(websocket: WebSocket):
 
             if data["type"] == "analyze":
                 tickers = data["tickers"]
+                encoding = data.get("encoding", "json")
                 logger.info(f"Analyzing tickers: {tickers}")
 
                 try:
-                    results = await analyze_multiple_tickers(tickers)
-
-                    for ticker, result in results.items():
-                        if 'error' in result:
-                            await websocket.send_json({
-                                "type": "error",
-                                "message": result['error']
-                            })
-                            continue
-
-                        await websocket.send_json({
-                            "type": "analysis_result",
-                            "ticker": ticker,
-                            "data": {
-                                "price_history": {
-                                    "dates": result["price_history"]["dates"],
-                                    "prices": result["price_history"]["prices"],
-                                    "volumes": result["price_history"]["volumes"]
-                                },
-                                "metrics": {
-                                    "latest_price": result["metrics"]["latest_price"],
-                                    "volume": result["metrics"]["volume"],
-                                    "market_cap": result["metrics"]["market_cap"],
-                                    "technical": {
-                                        "rsi": result["metrics"]["technical"]["rsi"],
-                                        "sma_50": result["metrics"]["technical"]["sma_50"],
-                                        "sma_200": result["metrics"]["technical"]["sma_200"],
-                                        "volatility": result["metrics"]["technical"]["volatility"]
-                                    }
-                                }
-                            }
-                        })
-
-                    await websocket.send_json({
-                        "type": "analysis_complete"
-                    })
-
+                    if encoding not in PRICE_HISTORY_ENCODINGS:
+                        raise ValueError(f"Unsupported price history encoding: {encoding}")
+                    await stream_analyses(websocket, tickers, encoding)
+                except WebSocketDisconnect:
+                    raise
                 except Exception as e:
                     logger.error(f"Analysis error: {str(e)}")
-                    await websocket.send_json({
+                    await send_message(websocket, {
                         "type": "error",
                         "message": f"Analysis failed: {str(e)}"
                     })
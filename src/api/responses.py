@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from src.serialization import dumps
+
+class NumpyJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson with NumPy support
+
+    Return it directly from endpoints: FastAPI runs jsonable_encoder over
+    plain dict return values, which does not understand NumPy arrays.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
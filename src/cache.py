@@ -1,31 +1,146 @@
-from functools import lru_cache
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import heapq
+import sys
+import threading
 import time
 
+# Items of a list or tuple that estimate_size inspects before extrapolating
+_SIZE_SAMPLE = 32
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """Approximate memory footprint in bytes, using buffer sizes for DataFrames and arrays"""
+    if hasattr(value, 'memory_usage') and hasattr(value, 'index'):
+        # pandas DataFrame / Series; summed per column because DataFrame.memory_usage
+        # builds a Series keyed by column name, which costs more than the sizing
+        columns = value.items() if hasattr(value, 'columns') else [(None, value)]
+        size = sum(column.memory_usage(deep=True, index=False) for _, column in columns)
+        return int(size + value.index.memory_usage(deep=True))
+    if hasattr(value, 'nbytes') and not isinstance(value, (bytes, bytearray, memoryview)):
+        # numpy arrays
+        return int(value.nbytes)
+
+    size = sys.getsizeof(value)
+    if _depth >= 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        # Long sequences are extrapolated from a sample so sizing stays cheap
+        sample = value[:_SIZE_SAMPLE]
+        if sample:
+            size += sum(estimate_size(item, _depth + 1) for item in sample) * len(value) // len(sample)
+    elif isinstance(value, (set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
 class TTLCache:
-    """Time-based cache with automatic expiration"""
-    def __init__(self, ttl_seconds: int = 3600):
-        self._cache: Dict[str, tuple[Any, float]] = {}
+    """
+    LRU cache with per-entry expiry and optional entry-count and byte limits
+
+    Expired entries are dropped lazily from a heap of deadlines on every
+    access, so no full scan is needed. Least recently used entries are
+    evicted once either limit is exceeded. Operations hold a lock but never
+    block or await, so the cache is safe to share between threads and the
+    event loop.
+    """
+    def __init__(self, ttl_seconds: int = 3600, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self._cache: 'OrderedDict[str, tuple[Any, float, int]]' = OrderedDict()
+        self._deadlines: list = []
         self._ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
     def get(self, key: str) -> Any:
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp <= self._ttl:
-                return value
-            del self._cache[key]
-        return None
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        size = estimate_size(value) if self.max_bytes is not None else 0
+        deadline = time.monotonic() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.evictions += 1
+                return
+            self._cache[key] = (value, deadline, size)
+            self._bytes += size
+            heapq.heappush(self._deadlines, (deadline, key))
+            if len(self._deadlines) > 2 * len(self._cache) + 64:
+                # Drop heap records left behind by overwritten or evicted keys
+                self._deadlines = [(entry[1], k) for k, entry in self._cache.items()]
+                heapq.heapify(self._deadlines)
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
 
-    def set(self, key: str, value: Any) -> None:
-        self._cache[key] = (value, time.time())
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._deadlines.clear()
+            self._bytes = 0
 
     def clear_expired(self) -> None:
-        current_time = time.time()
-        self._cache = {
-            k: v for k, v in self._cache.items()
-            if current_time - v[1] <= self._ttl
-        }
+        with self._lock:
+            self._expire(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self._deadlines)
+            entry = self._cache.get(key)
+            # Skip records for keys that were since overwritten or removed
+            if entry is not None and entry[1] == deadline:
+                self._remove(key)
+                self.expirations += 1
+
+    def _evict(self) -> None:
+        while self._cache and (
+            (self.max_entries is not None and len(self._cache) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self._cache.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
 
 # Global cache instances
-price_cache = TTLCache(ttl_seconds=300)  # 5 minutes for price data
-analysis_cache = TTLCache(ttl_seconds=3600)  # 1 hour for analysis results
\ No newline at end of file
+price_cache = TTLCache(ttl_seconds=300, max_entries=1000, max_bytes=256 * 2**20)  # 5 minutes for price data
+response_cache = TTLCache(ttl_seconds=300, max_entries=2000, max_bytes=64 * 2**20)  # Serialized API responses, keyed by the ETag of the prices behind them
+indicator_cache = TTLCache(ttl_seconds=86400, max_entries=5000)  # Incremental indicator state, refreshed bar by bar
+metrics_cache = TTLCache(ttl_seconds=300, max_entries=5000, max_bytes=64 * 2**20)  # Batch panel metrics, keyed by the bars they came from
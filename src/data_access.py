@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import functools
+import threading
+import time
+import weakref
+
+class TokenBucket:
+    """
+    Allows ``rate`` acquisitions per second on average, with bursts up to ``capacity``
+
+    The tokens are shared by every event loop using the bucket; the lock
+    waiters queue on is created per loop when first needed, because an
+    asyncio lock belongs to the loop that first waits on it.
+    """
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._guard = threading.Lock()
+        self._locks = weakref.WeakKeyDictionary()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock():
+            while True:
+                with self._guard:
+                    now = time.monotonic()
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            lock = self._locks.get(loop)
+            if lock is None:
+                lock = self._locks[loop] = asyncio.Lock()
+            return lock
+
+@dataclass
+class SourceLimits:
+    """Concurrency, rate and timeout limits for one upstream data source"""
+    max_concurrency: int
+    rate: float
+    burst: Optional[float] = None
+    timeout: float = 30.0
+
+# Default limits per upstream source
+DEFAULT_SOURCES = {
+    'yahoo': SourceLimits(max_concurrency=8, rate=5.0, burst=10, timeout=30.0),
+    'glassnode': SourceLimits(max_concurrency=4, rate=2.0, burst=4, timeout=30.0),
+    'sec': SourceLimits(max_concurrency=4, rate=10.0, burst=10, timeout=60.0)
+}
+
+class DataAccessLayer:
+    """
+    Runs blocking connector calls off the event loop
+
+    Calls execute on a dedicated, bounded thread pool rather than the
+    loop's default executor. Each upstream source has a semaphore capping
+    calls in flight, a token bucket capping the request rate and a default
+    timeout. A call that times out or is cancelled stops being awaited and
+    releases its source slot; if it has not started yet it never runs.
+    Calls with ``source=None`` (local disk I/O) only use the pool.
+    Coroutines from async clients go through ``run_async``, which applies
+    the same limits on the loop without a pool thread. Semaphores are
+    created per event loop on first use, so the layer can be shared by
+    successive ``asyncio.run`` calls; the rate limits span all loops.
+    """
+    def __init__(self, max_workers: int = 32, sources: Dict[str, SourceLimits] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='data-access')
+        self.limits = dict(DEFAULT_SOURCES if sources is None else sources)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._semaphores_guard = threading.Lock()
+        self._buckets = {name: TokenBucket(l.rate, l.burst) for name, l in self.limits.items()}
+        self._stats = {name: {'calls': 0, 'in_flight': 0, 'timeouts': 0} for name in self.limits}
+
+    async def run(self, source: Optional[str], fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool under the limits of ``source``"""
+        call = functools.partial(fn, *args, **kwargs)
+        return await self._limited(source, lambda: self._submit(call), timeout)
+
+    async def run_async(self, source: Optional[str], fn: Callable[..., Awaitable], *args,
+                        timeout: Optional[float] = None, **kwargs) -> Any:
+        """Await ``fn(*args, **kwargs)`` on the loop under the limits of ``source``"""
+        return await self._limited(source, lambda: fn(*args, **kwargs), timeout)
+
+    async def _limited(self, source: Optional[str], start: Callable[[], Awaitable], timeout: Optional[float]) -> Any:
+        if source is None:
+            return await asyncio.wait_for(start(), timeout)
+
+        limits = self.limits[source]
+        stats = self._stats[source]
+        async with self._semaphore(source):
+            await self._buckets[source].acquire()
+            stats['calls'] += 1
+            stats['in_flight'] += 1
+            try:
+                return await asyncio.wait_for(start(), limits.timeout if timeout is None else timeout)
+            except asyncio.TimeoutError:
+                stats['timeouts'] += 1
+                raise
+            finally:
+                stats['in_flight'] -= 1
+
+    def _semaphore(self, source: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._semaphores_guard:
+            semaphores = self._semaphores.get(loop)
+            if semaphores is None:
+                semaphores = self._semaphores[loop] = {
+                    name: asyncio.Semaphore(l.max_concurrency) for name, l in self.limits.items()
+                }
+            return semaphores[source]
+
+    def _submit(self, call: Callable) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Global data access layer
+data_access = DataAccessLayer()
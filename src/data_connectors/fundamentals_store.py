@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+import pandas as pd
+import pyarrow as pa
+import yfinance as yf
+
+from src.cache import TTLCache
+from src.data_access import data_access
+from src.data_connectors.storage import KeyedLocks, atomic_write, safe_filename, write_arrow
+
+logger = logging.getLogger(__name__)
+
+FUNDAMENTALS_DIR = Path("data/cache/fundamentals")
+
+# Seconds each dataset stays fresh: ticker info daily, statements quarterly
+DATASET_TTLS = {
+    'info': 86400,
+    'balance_sheet': 90 * 86400,
+    'cash_flow': 90 * 86400,
+    'income_stmt': 90 * 86400
+}
+
+_YAHOO_FETCHERS = {
+    'info': lambda ticker: yf.Ticker(ticker).info,
+    'balance_sheet': lambda ticker: yf.Ticker(ticker).balance_sheet,
+    'cash_flow': lambda ticker: yf.Ticker(ticker).cashflow,
+    'income_stmt': lambda ticker: yf.Ticker(ticker).income_stmt
+}
+
+
+class FundamentalsStore:
+    """
+    Ticker info and financial statements cached in memory and under data/cache
+
+    Each (ticker, dataset) entry is one file: JSON for info, Arrow for
+    statements. Its modification time is the fetch time, so an entry stays
+    fresh for its dataset's TTL across restarts. Reads check memory, then
+    disk, and only fetch from Yahoo once both are stale.
+    """
+
+    def __init__(self, root=FUNDAMENTALS_DIR, ttls: Dict[str, float] = None,
+                 fetchers: Dict[str, Callable[[str], Any]] = None, max_entries: int = 10000):
+        self.root = Path(root)
+        self.ttls = dict(DATASET_TTLS if ttls is None else ttls)
+        self.fetchers = dict(_YAHOO_FETCHERS if fetchers is None else fetchers)
+        self._memory = TTLCache(ttl_seconds=max(self.ttls.values()), max_entries=max_entries)
+        self._lock = KeyedLocks()
+
+    def path(self, ticker: str, dataset: str) -> Path:
+        return self.root / safe_filename(ticker) / (f"{dataset}.json" if dataset == 'info' else f"{dataset}.arrow")
+
+    def is_fresh(self, ticker: str, dataset: str) -> bool:
+        """Whether get can serve the entry without going to the network"""
+        return self._memory.get((ticker, dataset)) is not None or self._disk_age(ticker, dataset) < self.ttls[dataset]
+
+    def get(self, ticker: str, dataset: str) -> Any:
+        """Cached dataset for a ticker, fetched and persisted when missing or stale"""
+        key = (ticker, dataset)
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+
+        with self._lock(key):
+            value = self._memory.get(key)
+            if value is not None:
+                return value
+            age = self._disk_age(ticker, dataset)
+            if age < self.ttls[dataset]:
+                value = self._read(ticker, dataset)
+            else:
+                value = self.fetchers[dataset](ticker)
+                self._write(ticker, dataset, value)
+                age = 0.0
+            self._memory.set(key, value, ttl=self.ttls[dataset] - age)
+            return value
+
+    async def load(self, ticker: str, dataset: str) -> Any:
+        """Async get: memory hits return directly, disk reads and fetches run in the data access pool"""
+        value = self._memory.get((ticker, dataset))
+        if value is not None:
+            return value
+        source = None if self.is_fresh(ticker, dataset) else 'yahoo'
+        return await data_access.run(source, self.get, ticker, dataset)
+
+    async def prefetch(self, tickers: Iterable[str], datasets: Iterable[str] = ('info',)) -> None:
+        """Make the given datasets fresh for every ticker; failures are logged and skipped"""
+        async def load(ticker, dataset):
+            try:
+                await self.load(ticker, dataset)
+            except Exception as e:
+                logger.warning(f"Prefetching {dataset} for {ticker} failed: {str(e)}")
+
+        datasets = list(datasets)
+        await asyncio.gather(*(load(t, d) for t in dict.fromkeys(tickers) for d in datasets))
+
+    def _disk_age(self, ticker: str, dataset: str) -> float:
+        try:
+            return time.time() - self.path(ticker, dataset).stat().st_mtime
+        except FileNotFoundError:
+            return float('inf')
+
+    def _read(self, ticker: str, dataset: str) -> Any:
+        path = self.path(ticker, dataset)
+        if dataset == 'info':
+            with open(path) as f:
+                return json.load(f)
+        with pa.memory_map(str(path), 'r') as source:
+            frame = pa.ipc.open_file(source).read_all().to_pandas()
+        # Statement columns are report dates, stored as ISO strings
+        frame.columns = pd.to_datetime(frame.columns)
+        return frame
+
+    def _write(self, ticker: str, dataset: str, value: Any) -> None:
+        path = self.path(ticker, dataset)
+        if dataset == 'info':
+            def write(tmp_path: str) -> None:
+                with open(tmp_path, 'w') as f:
+                    json.dump(value, f, default=str)
+            atomic_write(path, write)
+            return
+        frame = value.copy()
+        frame.columns = [pd.Timestamp(c).isoformat() for c in frame.columns]
+        write_arrow(path, pa.Table.from_pandas(frame, preserve_index=True))
+
+
+# Global store instance
+fundamentals_store = FundamentalsStore()
@@ -1,29 +1,145 @@
-import requests
+import asyncio
+import logging
 import os
-from datetime import datetime
-from src.config.config import Config
-from cachetools import cached, TTLCache
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import aiohttp
+import pandas as pd
+import pyarrow as pa
+
+from config.config import Config
+from src.data_access import data_access
+from src.data_connectors.storage import safe_filename, write_arrow
+from src.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+GLASSNODE_DIR = Path("data/cache/glassnode")
+
+# Seconds a stored series is served before asking for newer points, by resolution
+REFRESH_AFTER = {'10m': 600, '1h': 3600, '24h': 3600, '1w': 86400, '1month': 86400}
+
 
 class GlassnodeConnector:
+    """
+    Glassnode metric series, persisted per (asset, metric, frequency) as Arrow files
+
+    Requests share one aiohttp session, so connections are kept alive
+    between calls, and run under the data access layer's 'glassnode' rate
+    and concurrency limits. A stored series older than its resolution's
+    refresh interval is extended by asking only for points from its last
+    timestamp onwards (``s``/``u``); the overlapping point is replaced by
+    the fetched one. If a refresh fails, the stored series is served.
+    Concurrent requests for the same series share one fetch.
+    """
     BASE_URL = "https://api.glassnode.com/v1/metrics"
-    
-    def __init__(self):
-        self.api_key = Config.GLASSNODE_API
-        self.cache = TTLCache(maxsize=100, ttl=3600)
-    
-    @cached(cache)
-    def get_metric(self, metric: str, asset: str = "BTC", frequency: str = "24h"):
-        endpoint = f"{self.BASE_URL}/{metric}"
-        params = {
-            "a": asset,
-            "i": frequency,
-            "api_key": self.api_key
-        }
-        response = requests.get(endpoint, params=params)
-        return response.json()
-    
-    def get_miner_flows(self):
-        return self.get_metric("mining/flow_sum")
-    
-    def get_exchange_balances(self):
-        return self.get_metric("distribution/balance_exchanges")
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = BASE_URL, root=GLASSNODE_DIR,
+                 refresh_after: Dict[str, float] = None, max_connections: int = 8):
+        self.api_key = Config.GLASSNODE_API if api_key is None else api_key
+        self.base_url = base_url.rstrip('/')
+        self.root = Path(root)
+        self.refresh_after = dict(REFRESH_AFTER if refresh_after is None else refresh_after)
+        self.max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flight = SingleFlight()
+
+    async def __aenter__(self) -> 'GlassnodeConnector':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def path(self, metric: str, asset: str, frequency: str) -> Path:
+        return self.root / asset / f"{safe_filename(metric)}_{frequency}.arrow"
+
+    async def get_metric(self, metric: str, asset: str = "BTC", frequency: str = "24h") -> pd.DataFrame:
+        """Metric series indexed by UTC timestamp: a ``v`` column, or ``o.*`` columns for object-valued metrics"""
+        return await self._flight.do((metric, asset, frequency), self._load, metric, asset, frequency)
+
+    async def get_metrics(self, metrics: Iterable[str], asset: str = "BTC",
+                          frequency: str = "24h") -> Dict[str, pd.DataFrame]:
+        """Several metrics fetched concurrently within the rate limits"""
+        metrics = list(dict.fromkeys(metrics))
+        frames = await asyncio.gather(*(self.get_metric(m, asset, frequency) for m in metrics))
+        return dict(zip(metrics, frames))
+
+    async def get_miner_flows(self) -> pd.DataFrame:
+        return await self.get_metric("mining/flow_sum")
+
+    async def get_exchange_balances(self) -> pd.DataFrame:
+        return await self.get_metric("distribution/balance_exchanges")
+
+    async def _load(self, metric: str, asset: str, frequency: str) -> pd.DataFrame:
+        path = self.path(metric, asset, frequency)
+        stored = await data_access.run(None, _read, path)
+        if stored is not None and time.time() - path.stat().st_mtime < self.refresh_after.get(frequency, 3600):
+            return stored
+
+        params = {'a': asset, 'i': frequency, 'f': 'JSON', 'u': int(time.time())}
+        if stored is not None and not stored.empty:
+            params['s'] = int(stored.index[-1].timestamp())
+        try:
+            newer = _frame(await data_access.run_async('glassnode', self._request, metric, params))
+        except Exception as e:
+            if stored is None:
+                raise
+            logger.warning(f"Serving stored {metric} for {asset}; refresh failed: {str(e)}")
+            return stored
+
+        if stored is not None and newer.empty:
+            # Nothing new yet; restart the refresh interval without rewriting the file
+            os.utime(path)
+            return stored
+        frame = newer if stored is None else _merge(stored, newer)
+        await data_access.run(None, _write, path, frame)
+        return frame
+
+    async def _request(self, metric: str, params: Dict[str, object]) -> list:
+        async with self._client().get(f"{self.base_url}/{metric}", params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _client(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                headers={'X-Api-Key': self.api_key or ''}
+            )
+        return self._session
+
+
+def _frame(points: list) -> pd.DataFrame:
+    """Glassnode [{'t': ..., 'v' or 'o': ...}] points as a frame indexed by UTC timestamp"""
+    if not points:
+        return pd.DataFrame(index=pd.DatetimeIndex([], tz='UTC', name='t'))
+    frame = pd.json_normalize(points)
+    frame.index = pd.to_datetime(frame.pop('t'), unit='s', utc=True)
+    frame.index.name = 't'
+    return frame
+
+
+def _merge(stored: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+    """Append fetched points, letting them win on timestamps already stored"""
+    if newer.empty:
+        return stored
+    combined = pd.concat([stored, newer])
+    return combined[~combined.index.duplicated(keep='last')].sort_index()
+
+
+def _read(path: Path) -> Optional[pd.DataFrame]:
+    if not path.exists():
+        return None
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _write(path: Path, frame: pd.DataFrame) -> None:
+    write_arrow(path, pa.Table.from_pandas(frame, preserve_index=True))
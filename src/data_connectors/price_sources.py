@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, Callable, Collection, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import yfinance as yf
+
+from src.data_access import data_access
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of all watched tickers
+POLL_INTERVAL = 60
+# Tickers per yf.download quote request
+QUOTE_BATCH_SIZE = 100
+
+# Columns of a tick file: one row per quote
+TICK_COLUMNS = ('timestamp', 'ticker', 'price')
+
+
+class PriceSource(ABC):
+    """
+    Where MarketTrigger gets its quotes
+
+    ``stream`` yields batches of {ticker: price} for the tickers returned by
+    ``watched``, which is called again for each batch so triggers added or
+    removed at runtime are picked up. The stream ends when the source has
+    no more quotes; a live source never ends on its own.
+    """
+
+    @abstractmethod
+    def stream(self, watched: Callable[[], Collection[str]]) -> AsyncIterator[Dict[str, float]]:
+        """Batches of {ticker: price}; implementations are async generators"""
+
+
+def _yahoo_quotes(tickers: List[str]) -> Dict[str, float]:
+    """Latest one-minute close for each ticker from a single yf.download request"""
+    frame = yf.download(tickers=tickers, period='1d', interval='1m', group_by='ticker',
+                        threads=True, auto_adjust=True, progress=False)
+    quotes = {}
+    for ticker in tickers:
+        if isinstance(frame.columns, pd.MultiIndex):
+            if ticker not in frame.columns.get_level_values(0):
+                continue
+            closes = frame[ticker]['Close']
+        else:
+            closes = frame['Close']
+        closes = closes.dropna()
+        if not closes.empty:
+            quotes[ticker] = float(closes.iloc[-1])
+    return quotes
+
+
+class YahooPriceSource(PriceSource):
+    """Polls Yahoo every ``poll_interval`` seconds, ``batch_size`` tickers per request"""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL, batch_size: int = QUOTE_BATCH_SIZE):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+
+    async def stream(self, watched: Callable[[], Collection[str]]) -> AsyncIterator[Dict[str, float]]:
+        while True:
+            started = time.monotonic()
+            tickers = list(watched())
+            for i in range(0, len(tickers), self.batch_size):
+                batch = tickers[i:i + self.batch_size]
+                try:
+                    yield await data_access.run('yahoo', _yahoo_quotes, batch)
+                except Exception as e:
+                    logger.error(f"Error fetching quotes for {len(batch)} tickers: {str(e)}")
+            await asyncio.sleep(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+
+def read_ticks(path) -> pd.DataFrame:
+    """Tick file (Arrow/Feather or CSV) as a frame of timestamp, ticker, price sorted by time"""
+    path = Path(path)
+    if path.suffix == '.csv':
+        frame = pd.read_csv(path, usecols=list(TICK_COLUMNS))
+    else:
+        frame = feather.read_feather(path, columns=list(TICK_COLUMNS))
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    return frame.sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+def write_ticks(frame: pd.DataFrame, path) -> None:
+    """Write ticks for ReplayPriceSource; CSV when the path ends in .csv, uncompressed Arrow otherwise"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    frame = frame[list(TICK_COLUMNS)]
+    if path.suffix == '.csv':
+        frame.to_csv(path, index=False)
+    else:
+        feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False), path,
+                              compression='uncompressed')
+
+
+def synthetic_ticks(tickers: Iterable[str], steps: int, interval: float = 1.0, volatility: float = 0.002,
+                    start: Optional[pd.Timestamp] = None, seed: int = 0) -> pd.DataFrame:
+    """Random-walk quotes for every ticker every ``interval`` seconds, starting between 10 and 500"""
+    tickers = list(tickers)
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-02 14:30') if start is None else pd.Timestamp(start)
+    moves = rng.normal(0.0, volatility, size=(steps, len(tickers)))
+    moves[0] = 0.0
+    prices = rng.uniform(10, 500, size=len(tickers)) * np.exp(np.cumsum(moves, axis=0))
+    times = start + pd.to_timedelta(np.arange(steps) * interval, unit='s')
+    return pd.DataFrame({
+        'timestamp': np.repeat(times.to_numpy(), len(tickers)),
+        'ticker': np.tile(np.array(tickers, dtype=object), steps),
+        'price': prices.ravel()
+    })
+
+
+class ReplayPriceSource(PriceSource):
+    """
+    Replays a tick file, yielding all quotes sharing a timestamp as one batch
+
+    ``speed`` scales the recorded time between batches: 1.0 replays in real
+    time, 60.0 a minute per second, and None as fast as possible (yielding
+    to the loop between batches so callbacks keep up). Ticks for tickers
+    that are not watched are dropped.
+    """
+
+    def __init__(self, path, speed: Optional[float] = 1.0):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Replay speed must be positive, got {speed}")
+        frame = read_ticks(path)
+        self.speed = speed
+        self._times = frame['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+        self._tickers = frame['ticker'].astype(str).tolist()
+        self._prices = frame['price'].to_numpy(dtype=np.float64).tolist()
+        self._bounds = np.flatnonzero(np.diff(self._times)) + 1
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    async def stream(self, watched: Callable[[], Collection[str]]) -> AsyncIterator[Dict[str, float]]:
+        if not self._prices:
+            return
+        starts = [0] + self._bounds.tolist()
+        ends = self._bounds.tolist() + [len(self._prices)]
+        first = self._times[0]
+        began = time.monotonic()
+        for lo, hi in zip(starts, ends):
+            if self.speed is None:
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(max(0.0, began + (self._times[lo] - first) / self.speed - time.monotonic()))
+            tickers = watched()
+            yield {t: p for t, p in zip(self._tickers[lo:hi], self._prices[lo:hi]) if t in tickers}
@@ -0,0 +1,220 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import yfinance as yf
+
+from src.data_connectors.storage import KeyedLocks, safe_filename, write_arrow
+
+logger = logging.getLogger(__name__)
+
+PRICE_STORE_DIR = Path("data/cache/prices")
+
+# Calendar days covered by yfinance period strings
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183,
+    '1y': 366, '2y': 731, '5y': 1827, '10y': 3653
+}
+
+_COVERED_FROM = b'covered_from'
+
+
+def _yahoo_history(ticker: str, start: Optional[datetime], end: Optional[datetime]) -> pd.DataFrame:
+    """Daily bars from yfinance for [start, end); everything available when start is None"""
+    if start is None:
+        frame = yf.Ticker(ticker).history(period='max')
+        return frame if end is None else frame[_dates(frame.index) < end]
+    kwargs = {'start': start.strftime('%Y-%m-%d')}
+    if end is not None:
+        kwargs['end'] = end.strftime('%Y-%m-%d')
+    return yf.Ticker(ticker).history(**kwargs)
+
+
+def _dates(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Wall-clock dates without timezone, for comparing against requested start dates"""
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """First calendar date covered by a yfinance period string; None for 'max'"""
+    now = now or datetime.now()
+    today = datetime(now.year, now.month, now.day)
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return datetime(now.year, 1, 1)
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period: {period}")
+    return today - timedelta(days=PERIOD_DAYS[period])
+
+
+class PriceStore:
+    """
+    On-disk store of daily bars with one Arrow (Feather v2) file per ticker
+
+    Bars are indexed by timezone-free trading date, and files are written
+    uncompressed so reads memory-map them. A read whose
+    file is older than ``refresh_after`` seconds asks the fetcher only for
+    bars from the last two stored dates onwards and appends them. The older
+    overlapping bar is compared with the stored one; if they differ, the
+    adjusted history has moved (dividend or split) and the covered range is
+    fetched again in full. Lookbacks before the covered range are
+    backfilled and prepended. Writes go to a temporary file that replaces
+    the old one atomically. If a refresh fails, the stored bars are served.
+    """
+
+    def __init__(self, root=PRICE_STORE_DIR, fetch: Callable = _yahoo_history, refresh_after: float = 300):
+        self.root = Path(root)
+        self.fetch = fetch
+        self.refresh_after = refresh_after
+        self._lock = KeyedLocks()
+
+    def path(self, ticker: str) -> Path:
+        return self.root / f"{safe_filename(ticker)}.arrow"
+
+    def get_history(self, ticker: str, period: str = '1y', start: Optional[datetime] = None) -> pd.DataFrame:
+        """Daily bars from ``start`` (or the start of ``period``) to the latest available bar"""
+        start = period_start(period) if start is None else start
+        with self._lock(ticker):
+            frame, covered_from = self._read(ticker)
+            try:
+                frame, covered_from = self._refresh(ticker, frame, covered_from, start)
+            except Exception as e:
+                if frame is None:
+                    raise
+                logger.warning(f"Serving stored prices for {ticker}; refresh failed: {str(e)}")
+
+        if start is not None and not frame.empty:
+            frame = frame[_dates(frame.index) >= start]
+        return frame
+
+    def is_fresh(self, ticker: str, start: Optional[datetime]) -> bool:
+        """Whether get_history can serve bars from ``start`` without going to the network"""
+        path = self.path(ticker)
+        try:
+            if time.time() - path.stat().st_mtime >= self.refresh_after:
+                return False
+            # Files are replaced atomically, so the schema can be read without the ticker lock
+            with pa.memory_map(str(path), 'r') as source:
+                covered_from = _covered_from(pa.ipc.open_file(source).schema)
+        except FileNotFoundError:
+            return False
+        return covered_from is None or (start is not None and start >= covered_from)
+
+    def expire(self, ticker: str) -> None:
+        """Mark the stored bars stale so the next get_history fetches newer ones"""
+        with self._lock(ticker):
+            path = self.path(ticker)
+            if path.exists():
+                os.utime(path, (0, 0))
+
+    def put(self, ticker: str, frame: pd.DataFrame, start: Optional[datetime]) -> pd.DataFrame:
+        """Store bars fetched elsewhere (e.g. a bulk download) that cover everything from ``start``; returns them as stored"""
+        frame = _normalize(frame)
+        with self._lock(ticker):
+            stored, covered_from = self._read(ticker)
+            if stored is None or stored.empty or not _consistent(stored, frame):
+                self._write(ticker, frame, start)
+            else:
+                if start is not None and covered_from is not None:
+                    start = min(start, covered_from)
+                self._write(ticker, _merge(stored, frame), None if covered_from is None else start)
+        return frame
+
+    def _read(self, ticker: str):
+        path = self.path(ticker)
+        if not path.exists():
+            return None, None
+        with pa.memory_map(str(path), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+            frame = _normalize(table.to_pandas())
+        return frame, _covered_from(table.schema)
+
+    def _write(self, ticker: str, frame: pd.DataFrame, covered_from: Optional[datetime]) -> None:
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_COVERED_FROM] = b'max' if covered_from is None else covered_from.isoformat().encode()
+        write_arrow(self.path(ticker), table.replace_schema_metadata(metadata))
+
+    def _refresh(self, ticker: str, frame, covered_from, start):
+        if frame is None or frame.empty:
+            frame = self._fetch(ticker, start, None)
+            self._write(ticker, frame, start)
+            return frame, start
+
+        changed = False
+        if covered_from is not None and (start is None or start < covered_from):
+            # Backfill the lookback in front of what is stored
+            older = self._fetch(ticker, start, covered_from, allow_empty=True)
+            frame = _merge(older, frame)
+            covered_from = start
+            changed = True
+
+        age = time.time() - self.path(ticker).stat().st_mtime
+        if age >= self.refresh_after:
+            overlap_start = _dates(frame.index)[max(len(frame) - 2, 0)].to_pydatetime()
+            newer = self._fetch(ticker, overlap_start, None, allow_empty=True)
+            if not _consistent(frame, newer):
+                logger.info(f"Adjusted history changed for {ticker}; refetching stored range")
+                frame = self._fetch(ticker, covered_from, None)
+            else:
+                frame = _merge(frame, newer)
+            changed = True
+
+        if changed:
+            self._write(ticker, frame, covered_from)
+        return frame, covered_from
+
+    def _fetch(self, ticker: str, start, end, allow_empty: bool = False) -> pd.DataFrame:
+        frame = _normalize(self.fetch(ticker, start, end))
+        if frame.empty and not allow_empty:
+            raise ValueError(f"No data available for {ticker}")
+        return frame
+
+
+def _covered_from(schema: pa.Schema) -> Optional[datetime]:
+    """Start of the range a stored file covers, from its schema metadata; None when it goes back to 'max'"""
+    covered_from = (schema.metadata or {}).get(_COVERED_FROM, b'').decode()
+    return None if covered_from == 'max' else datetime.fromisoformat(covered_from)
+
+
+def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+    """Index daily bars by timezone-free date, so per-ticker and bulk downloads line up"""
+    if frame.empty:
+        # yfinance returns a frame without a DatetimeIndex when it has no bars
+        return frame
+    frame = frame.copy()
+    frame.index = _dates(frame.index).normalize()
+    frame.index.name = 'Date'
+    return frame
+
+
+def _merge(older: pd.DataFrame, newer: pd.DataFrame) -> pd.DataFrame:
+    """Concatenate bars, letting ``newer`` win on dates present in both"""
+    if older.empty:
+        return newer
+    if newer.empty:
+        return older
+    combined = pd.concat([older, newer])
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def _consistent(stored: pd.DataFrame, fetched: pd.DataFrame) -> bool:
+    """Whether a fetched tail agrees with the stored close of the older overlapping bar"""
+    if len(stored) < 2 or fetched.empty:
+        return True
+    date = stored.index[-2]
+    if date not in fetched.index:
+        return True
+    return bool(np.isclose(stored['Close'].iloc[-2], fetched.loc[date, 'Close'], rtol=1e-6))
+
+
+# Global store instance
+price_store = PriceStore()
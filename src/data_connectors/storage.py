@@ -0,0 +1,51 @@
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+def safe_filename(name: str) -> str:
+    """A ticker, metric or other key with every character unsafe in file names replaced by '_'"""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name)
+
+
+def atomic_write(path: Path, write: Callable[[str], None]) -> None:
+    """
+    Write a file through ``write(tmp_path)`` and move it into place atomically
+
+    The temporary file sits next to ``path``, so the rename never crosses
+    filesystems and readers see either the old file or the new one. It is
+    removed if writing fails.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_arrow(path: Path, table: pa.Table) -> None:
+    """Atomically write an uncompressed Arrow (Feather v2) file, so reads can memory-map it"""
+    atomic_write(path, lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed'))
+
+
+class KeyedLocks:
+    """A threading.Lock per key, created on first use; call with a key to get its lock"""
+
+    def __init__(self):
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, key: Hashable) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
@@ -1,8 +1,10 @@
-import yfinance as yf
 import pandas as pd
 import logging
 from datetime import datetime, timedelta
 
+from src.data_connectors.fundamentals_store import fundamentals_store
+from src.data_connectors.price_store import price_store
+
 logger = logging.getLogger(__name__)
 
 class YahooConnector:
@@ -14,7 +16,7 @@ class YahooConnector:
         return ticker.upper().endswith('-USD') or ticker.upper() in ['BTC', 'ETH']
         
     def get_fundamentals(self, ticker: str) -> dict:
-        """Get fundamental data for a ticker"""
+        """Get fundamental data for a ticker, served from the fundamentals store"""
         try:
             # For cryptocurrencies, return a simplified structure
             if self.is_crypto(ticker):
@@ -22,8 +24,7 @@ class YahooConnector:
                 if not ticker.endswith('-USD'):
                     ticker = f"{ticker}-USD"
                     
-                crypto = yf.Ticker(ticker)
-                market_cap = crypto.info.get('marketCap', 0)
+                market_cap = fundamentals_store.get(ticker, 'info').get('marketCap', 0)
                 
                 return {
                     'raw_data': {
@@ -35,12 +36,11 @@ class YahooConnector:
                 }
             
             # For stocks, get full fundamentals
-            stock = yf.Ticker(ticker)
             return {
                 'raw_data': {
-                    'balance_sheet': stock.balance_sheet,
-                    'cash_flow': stock.cashflow,
-                    'income_stmt': stock.income_stmt
+                    'balance_sheet': fundamentals_store.get(ticker, 'balance_sheet'),
+                    'cash_flow': fundamentals_store.get(ticker, 'cash_flow'),
+                    'income_stmt': fundamentals_store.get(ticker, 'income_stmt')
                 }
             }
             
@@ -49,7 +49,7 @@ class YahooConnector:
             raise
             
     def get_historical_data(self, ticker: str, period: str = "1y") -> pd.DataFrame:
-        """Get historical price data"""
+        """Get historical price data, read through the on-disk price store"""
         try:
             # Adjust ticker format for crypto
             if self.is_crypto(ticker):
@@ -57,7 +57,7 @@ class YahooConnector:
                 if not ticker.endswith('-USD'):
                     ticker = f"{ticker}-USD"
             
-            data = yf.download(ticker, period=period)
+            data = price_store.get_history(ticker, period=period)
             if data.empty:
                 raise ValueError(f"No data available for {ticker}")
             return data
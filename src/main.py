@@ -4,109 +4,274 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import yfinance as yf
-from .cache import price_cache, analysis_cache
+from .cache import price_cache, indicator_cache, metrics_cache
+from .singleflight import analysis_flight, price_flight, info_flight
+from .data_access import data_access
+from .serialization import encode_price_history
 from .errors import AnalysisError, DataSourceError, ValidationError
+from .analytics.indicators import IndicatorState, compute_indicators
+from .data_connectors.price_store import period_start, price_store
+from .data_connectors.fundamentals_store import fundamentals_store
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Tuple
 import json
 import asyncio
+import threading
 
 logger = logging.getLogger(__name__)
 
-async def get_price_data(ticker: str) -> pd.DataFrame:
-    """Fetch historical price data for a ticker"""
+# Tickers per yf.download request when prefetching many tickers at once
+PREFETCH_BATCH_SIZE = 50
+# Seconds a single bulk download may take before it is abandoned
+BULK_DOWNLOAD_TIMEOUT = 120
+
+def _yahoo_symbol(ticker: str) -> str:
+    """Add '-USD' suffix for crypto tickers if not present"""
+    if ticker in ['BTC', 'ETH'] and not ticker.endswith('-USD'):
+        return f"{ticker}-USD"
+    return ticker
+
+async def get_price_data(ticker: str, period: str = '1y') -> pd.DataFrame:
+    """Fetch historical price data for a ticker; concurrent requests for the same history share one download"""
+    return await price_flight.do((ticker, period), _download_price_data, ticker, period)
+
+async def get_cached_price_data(ticker: str) -> pd.DataFrame:
+    """Price data from price_cache, fetched and cached on a miss"""
+    price_data = price_cache.get(ticker)
+    if price_data is None:
+        price_data = await get_price_data(ticker)
+        price_cache.set(ticker, price_data)
+    return price_data
+
+async def refresh_price_data(ticker: str) -> None:
+    """Drop cached prices and mark the stored bars stale, so the next read asks Yahoo for newer ones"""
+    price_cache.delete(ticker)
+    await data_access.run(None, price_store.expire, _yahoo_symbol(ticker))
+
+async def _download_price_data(ticker: str, period: str) -> pd.DataFrame:
     try:
-        # Add '-USD' suffix for crypto tickers if not present
-        if ticker in ['BTC', 'ETH'] and not ticker.endswith('-USD'):
-            ticker = f"{ticker}-USD"
+        ticker = _yahoo_symbol(ticker)
 
-        # Use yfinance to get data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period='1y')
+        # Read through the on-disk store, which only downloads bars it lacks;
+        # reads it can serve from disk skip the Yahoo limits
+        fresh = await data_access.run(None, price_store.is_fresh, ticker, period_start(period))
+        df = await data_access.run(None if fresh else 'yahoo', price_store.get_history, ticker, period)
         
         if df.empty:
-            raise DataSourceError(f"No data available for {ticker}")
+            raise DataSourceError(f"No data available for {ticker}", ticker)
             
         return df
         
     except Exception as e:
         logger.error(f"Error fetching data for {ticker}: {str(e)}")
-        raise DataSourceError(f"Failed to fetch data: {str(e)}")
+        raise DataSourceError(f"Failed to fetch data: {str(e)}", ticker)
+
+async def prefetch_price_data(tickers: List[str], period: str = '1y', batch_size: int = PREFETCH_BATCH_SIZE) -> None:
+    """
+    Fill price_cache for many tickers ahead of per-ticker analysis
+
+    Tickers the local price store can serve are read from disk; the rest
+    are fetched with batched yf.download calls and written to the store.
+    Tickers a batch fails to return are left for get_price_data.
+    """
+    start = period_start(period)
+    pending = [t for t in dict.fromkeys(tickers) if isinstance(t, str) and t.strip() and price_cache.get(t) is None]
+
+    fresh = await asyncio.gather(*(
+        data_access.run(None, price_store.is_fresh, _yahoo_symbol(t), start) for t in pending
+    ))
+    to_download = []
+    for ticker, is_fresh in zip(pending, fresh):
+        if is_fresh:
+            price_cache.set(ticker, await data_access.run(None, price_store.get_history, _yahoo_symbol(ticker), period))
+        else:
+            to_download.append(ticker)
+
+    for i in range(0, len(to_download), batch_size):
+        symbols = {_yahoo_symbol(t): t for t in to_download[i:i + batch_size]}
+        try:
+            frame = await data_access.run(
+                'yahoo', yf.download, tickers=list(symbols), period=period, group_by='ticker',
+                threads=True, auto_adjust=True, actions=True, progress=False, timeout=BULK_DOWNLOAD_TIMEOUT
+            )
+            bars = await data_access.run(None, _store_download, frame, symbols, start)
+        except Exception as e:
+            logger.warning(f"Bulk download failed for {list(symbols)}: {str(e)}")
+            continue
+        for symbol, df in bars.items():
+            price_cache.set(symbols[symbol], df)
+
+def _store_download(frame: pd.DataFrame, symbols: Dict[str, str], start) -> Dict[str, pd.DataFrame]:
+    """Split a group_by='ticker' download into per-ticker frames and persist them"""
+    bars = {}
+    for symbol in symbols:
+        if isinstance(frame.columns, pd.MultiIndex):
+            if symbol not in frame.columns.get_level_values(0):
+                continue
+            df = frame[symbol]
+        else:
+            df = frame
+        df = df.dropna(subset=['Close'])
+        if df.empty:
+            continue
+        df.columns.name = None
+        # Other tickers' trading days leave NaN rows that force volumes to float
+        df['Volume'] = df['Volume'].fillna(0).astype(np.int64)
+        bars[symbol] = price_store.put(symbol, df, start)
+    return bars
+
+def _optional_float(value) -> Any:
+    """Python float, or None where an indicator is undefined"""
+    return float(value) if np.isfinite(value) else None
 
 def calculate_metrics(price_data: pd.DataFrame) -> Dict[str, Any]:
-    """Calculate technical indicators and metrics"""
+    """Calculate technical indicators and metrics for one ticker, as a one-column panel"""
     try:
-        # Convert to simple Python types immediately
-        latest_price = float(price_data['Close'].iloc[-1])
-        latest_volume = int(price_data['Volume'].iloc[-1])
-        
-        # Calculate SMAs
-        sma_50 = None
-        sma_200 = None
-        if len(price_data) >= 50:
-            sma_50 = float(price_data['Close'].rolling(window=50).mean().iloc[-1])
-        if len(price_data) >= 200:
-            sma_200 = float(price_data['Close'].rolling(window=200).mean().iloc[-1])
-        
-        # Calculate RSI
-        delta = price_data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = float(100 - (100 / (1 + rs.iloc[-1]))) if not pd.isna(rs.iloc[-1]) else None
-        
-        # Calculate volatility
-        returns = price_data['Close'].pct_change()
-        volatility = float(returns.std() * np.sqrt(252)) if len(returns) > 1 else None
-        
-        # Convert returns to list of floats
-        returns_list = [float(x) for x in returns.dropna().tolist()]
-        
-        return {
-            'latest_price': latest_price,
-            'latest_volume': latest_volume,
-            'sma_50': sma_50,
-            'sma_200': sma_200,
-            'rsi': rsi,
-            'volatility': volatility,
-            'returns': returns_list
-        }
+        return calculate_panel_metrics({'': price_data})['']
     except Exception as e:
         logger.error(f"Error calculating metrics: {str(e)}")
         return {}
 
-def calculate_market_cap(ticker: str, latest_price: float) -> float:
-    """Calculate market cap using yfinance data"""
+def calculate_panel_metrics(price_data: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+    """Latest indicators (as _price_summary reports them) for many tickers in one pass per trading calendar"""
+    # Tickers on different calendars (e.g. crypto vs equities) get separate panels
+    calendars: Dict[tuple, List[str]] = {}
+    for ticker, frame in price_data.items():
+        calendars.setdefault(tuple(frame.index.asi8), []).append(ticker)
+
+    metrics = {}
+    for tickers in calendars.values():
+        closes = np.column_stack([price_data[t]['Close'].to_numpy(dtype=np.float64) for t in tickers])
+        indicators = compute_indicators(closes)
+        for column, ticker in enumerate(tickers):
+            returns = indicators['returns'][:, column]
+            metrics[ticker] = {
+                'latest_price': float(closes[-1, column]),
+                'latest_volume': int(price_data[ticker]['Volume'].iloc[-1]),
+                'sma_50': _optional_float(indicators['sma_50'][-1, column]),
+                'sma_200': _optional_float(indicators['sma_200'][-1, column]),
+                'rsi': _optional_float(indicators['rsi'][-1, column]),
+                'volatility': _optional_float(indicators['volatility'][column]),
+                'macd': _optional_float(indicators['macd'][-1, column]),
+                'macd_signal': _optional_float(indicators['macd_signal'][-1, column]),
+                'returns': returns[np.isfinite(returns)]
+            }
+    return metrics
+
+def _bars_key(ticker: str, price_data: pd.DataFrame) -> tuple:
+    """Identifies a price history by its length and latest bar, so results derived from it can be reused"""
+    latest = price_data.iloc[-1]
+    return ticker, len(price_data), price_data.index[-1], float(latest['Close']), float(latest['Volume'])
+
+async def prefetch_metrics(tickers: List[str], period: str = '1y', batch_size: int = PREFETCH_BATCH_SIZE) -> None:
+    """
+    Prefetch prices for a batch of tickers and compute their indicators as one panel
+
+    The per-ticker metrics go to metrics_cache under the price history they
+    came from, so _price_summary serves them instead of replaying each
+    ticker's indicator state while those prices are current.
+    """
+    await prefetch_price_data(tickers, period, batch_size)
+    frames = {}
+    for ticker in dict.fromkeys(tickers):
+        price_data = price_cache.get(ticker)
+        if price_data is not None and not price_data.empty and metrics_cache.get(_bars_key(ticker, price_data)) is None:
+            frames[ticker] = price_data
+    if not frames:
+        return
+    panel = await data_access.run(None, calculate_panel_metrics, frames)
+    for ticker, metrics in panel.items():
+        metrics_cache.set(_bars_key(ticker, frames[ticker]), metrics)
+
+_indicator_locks: Dict[str, threading.RLock] = {}
+_indicator_locks_guard = threading.Lock()
+
+def _indicator_lock(ticker: str) -> threading.RLock:
+    with _indicator_locks_guard:
+        return _indicator_locks.setdefault(ticker, threading.RLock())
+
+def update_indicator_state(ticker: str, price_data: pd.DataFrame) -> IndicatorState:
+    """Bring the cached indicator state for a ticker up to date with price_data, under the ticker's lock"""
+    with _indicator_lock(ticker):
+        return _update_indicator_state(ticker, price_data)
+
+def _update_indicator_state(ticker: str, price_data: pd.DataFrame) -> IndicatorState:
+    closes = price_data['Close'].to_numpy(dtype=np.float64)
+    volumes = price_data['Volume'].to_numpy()
+    timestamps = price_data.index
+
+    state = indicator_cache.get(ticker)
+    position = -1
+    if state is not None and state.last_timestamp is not None:
+        position = timestamps.searchsorted(state.last_timestamp)
+        if position >= len(timestamps) or timestamps[position] != state.last_timestamp:
+            position = -1
+
+    if position < 0:
+        state = IndicatorState.from_history(closes, volumes, timestamps)
+    else:
+        # The last bar we saw may have been a partial one that has since moved
+        if closes[position] != state.last_close or volumes[position] != state.last_volume:
+            state.amend(closes[position], volumes[position], timestamps[position])
+        for i in range(position + 1, len(closes)):
+            state.append(closes[i], volumes[i], timestamps[i])
+
+    indicator_cache.set(ticker, state)
+    return state
+
+async def get_ticker_info(ticker: str) -> Dict[str, Any]:
+    """yfinance info for a ticker, served from the fundamentals store; concurrent lookups share one request"""
+    return await info_flight.do(ticker, fundamentals_store.load, ticker, 'info')
+
+def calculate_market_cap(ticker: str, latest_price: float, info: Dict[str, Any] = None) -> float:
+    """Calculate market cap using yfinance data, or an info dict fetched beforehand"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        if info is None:
+            info = fundamentals_store.get(ticker, 'info')
         shares = info.get('sharesOutstanding', 0)
         return float(latest_price * shares) if shares else None
     except:
         return None
 
-async def analyze_stock(ticker: str) -> Dict[str, Any]:
-    """Main analysis function"""
+def _price_summary(ticker: str, price_data: pd.DataFrame, encoding: str = 'json'):
+    """Latest indicators from the batch panel or the cached state, plus the price history in the requested encoding"""
+    metrics = metrics_cache.get(_bars_key(ticker, price_data))
+    if metrics is None:
+        # Calculate metrics incrementally from the cached indicator state; the
+        # lock keeps another analysis of the ticker from moving it mid-snapshot
+        with _indicator_lock(ticker):
+            metrics = update_indicator_state(ticker, price_data).snapshot()
+        closes = price_data['Close'].to_numpy(dtype=np.float64)
+        returns = closes[1:] / closes[:-1] - 1
+        metrics['returns'] = returns[np.isfinite(returns)]
+    return metrics, encode_price_history(price_data, encoding)
+
+async def analyze_stock(ticker: str, encoding: str = 'json') -> Dict[str, Any]:
+    """Main analysis function; concurrent calls for the same ticker and price history encoding share one run"""
+    key = ticker if isinstance(ticker, str) else repr(ticker)
+    return await analysis_flight.do((key, encoding), _analyze_stock, ticker, encoding)
+
+async def _analyze_stock(ticker: str, encoding: str) -> Dict[str, Any]:
     try:
         if not isinstance(ticker, str) or not ticker.strip():
             raise ValidationError("Invalid ticker symbol", ticker)
 
         # Get price data
-        price_data = price_cache.get(ticker)
-        if price_data is None:
-            price_data = await get_price_data(ticker)
-            price_cache.set(ticker, price_data)
-
-        # Calculate metrics
-        metrics = calculate_metrics(price_data)
-        market_cap = calculate_market_cap(ticker, metrics['latest_price'])
-
-        # Prepare price history
-        price_history = {
-            'dates': [d.strftime('%Y-%m-%d') for d in price_data.index],
-            'prices': [float(p) for p in price_data['Close']],
-            'volumes': [int(v) for v in price_data['Volume']]
-        }
+        price_data = await get_cached_price_data(ticker)
+
+        # Indicator updates and history formatting are CPU work, so they run
+        # in the data access pool while the info lookup is in flight
+        info_task = asyncio.ensure_future(get_ticker_info(ticker))
+        try:
+            metrics, price_history = await data_access.run(None, _price_summary, ticker, price_data, encoding)
+        except Exception:
+            info_task.cancel()
+            raise
+        try:
+            info = await info_task
+        except Exception:
+            info = {}
+        market_cap = calculate_market_cap(ticker, metrics['latest_price'], info=info)
 
         result = {
             'ticker': ticker,
@@ -124,9 +289,6 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
             },
             'price_history': price_history
         }
-
-        # Cache the result
-        analysis_cache.set(ticker, result)
         return result
 
     except Exception as e:
@@ -136,8 +298,9 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
 # Alias for backward compatibility
 analyze_ticker = analyze_stock
 
-async def analyze_multiple_tickers(tickers: List[str]) -> Dict[str, Any]:
-    """Analyze multiple tickers concurrently"""
+async def analyze_multiple_tickers(tickers: List[str], batch_size: int = PREFETCH_BATCH_SIZE) -> Dict[str, Any]:
+    """Analyze multiple tickers concurrently after prefetching their prices and indicators in bulk"""
+    await prefetch_metrics(tickers, batch_size=batch_size)
     tasks = [analyze_stock(ticker) for ticker in tickers]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
@@ -154,6 +317,90 @@ async def analyze_multiple_tickers(tickers: List[str]) -> Dict[str, Any]:
             
     return processed_results
 
+async def iter_analyses(tickers: List[str], batch_size: int = PREFETCH_BATCH_SIZE,
+                        encoding: str = 'json') -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (ticker, result) pairs in completion order
+
+    Prices and indicators are prefetched batch by batch, and a ticker is
+    analyzed as soon as its batch has landed, so early batches stream
+    results while later ones are still downloading. Closing the iterator cancels pending work.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    batches = [
+        asyncio.ensure_future(prefetch_metrics(tickers[i:i + batch_size], batch_size=batch_size))
+        for i in range(0, len(tickers), batch_size)
+    ]
+
+    async def analyze(position: int, ticker: str):
+        try:
+            await asyncio.shield(batches[position // batch_size])
+        except Exception as e:
+            # analyze_stock falls back to a per-ticker download
+            logger.warning(f"Prefetch failed for {ticker}: {str(e)}")
+        return ticker, await analyze_stock(ticker, encoding)
+
+    tasks = [asyncio.ensure_future(analyze(i, t)) for i, t in enumerate(tickers)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks + batches:
+            task.cancel()
+
+async def iter_bounded_analyses(tickers: List[str], concurrency: int = 16, encoding: str = 'json',
+                                batch_size: int = PREFETCH_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield analysis results as they finish, holding at most a few batches in memory
+
+    A producer prefetches prices and indicators one batch at a time and
+    feeds a bounded work queue; ``concurrency`` workers analyze from it
+    into a bounded result queue. A slow consumer therefore stalls the workers instead of
+    letting results pile up, whatever the number of tickers. Failures are
+    yielded as ``{'error': str, 'ticker': ...}``. Closing the iterator
+    cancels outstanding work.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    work: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    finished = object()
+
+    async def produce():
+        for i in range(0, len(tickers), batch_size):
+            batch = tickers[i:i + batch_size]
+            try:
+                await prefetch_metrics(batch, batch_size=batch_size)
+            except Exception as e:
+                # analyze_stock falls back to per-ticker downloads
+                logger.warning(f"Prefetch failed for {batch}: {str(e)}")
+            for ticker in batch:
+                await work.put(ticker)
+        for _ in range(concurrency):
+            await work.put(None)
+
+    async def analyze_from_queue():
+        while (ticker := await work.get()) is not None:
+            try:
+                result = await analyze_stock(ticker, encoding)
+            except Exception as e:
+                result = {'error': str(e), 'ticker': ticker}
+            await results.put(result)
+        await results.put(finished)
+
+    tasks = [asyncio.ensure_future(produce())]
+    tasks += [asyncio.ensure_future(analyze_from_queue()) for _ in range(concurrency)]
+    try:
+        remaining = concurrency
+        while remaining:
+            result = await results.get()
+            if result is finished:
+                remaining -= 1
+            else:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
 if __name__ == "__main__":
     print("Starting main execution...", file=sys.stderr)
     
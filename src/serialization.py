@@ -0,0 +1,76 @@
+from typing import Any, Dict
+import base64
+
+import numpy as np
+import orjson
+import pandas as pd
+
+PRICE_HISTORY_ENCODINGS = ('json', 'columnar')
+
+# Version tag carried by columnar payloads so clients can tell the layout apart
+COLUMNAR_FORMAT = 'columnar-v1'
+
+_UINT32_MAX = np.iinfo(np.uint32).max
+
+def _base64(values: np.ndarray, dtype: str) -> str:
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+def _epoch_days(price_data: pd.DataFrame) -> np.ndarray:
+    """Trading dates as days since 1970-01-01, on the exchange's wall clock"""
+    index = price_data.index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+def encode_price_history(price_data: pd.DataFrame, encoding: str = 'json') -> Dict[str, Any]:
+    """
+    Price history payload in the requested encoding
+
+    ``json`` gives ISO date strings, with prices and volumes left as NumPy
+    arrays for dumps to write directly. ``columnar`` gives the first date
+    as an epoch day plus little-endian base64 columns: uint32 day deltas,
+    float32 closes, and volumes as uint32 (or float64 when they do not
+    fit, named by ``volume_dtype``). Columns are taken straight from the
+    frame's arrays without per-element conversion.
+    """
+    if encoding not in PRICE_HISTORY_ENCODINGS:
+        raise ValueError(f"Unsupported price history encoding: {encoding}")
+
+    days = _epoch_days(price_data)
+    closes = price_data['Close'].to_numpy(dtype=np.float64)
+    volumes = price_data['Volume'].to_numpy(dtype=np.float64)
+
+    if encoding == 'json':
+        return {
+            'dates': np.datetime_as_string(days.astype('datetime64[D]'), unit='D').tolist(),
+            'prices': closes,
+            'volumes': volumes.astype(np.int64)
+        }
+
+    fits_uint32 = volumes.size == 0 or (
+        volumes.min() >= 0 and volumes.max() <= _UINT32_MAX and np.array_equal(volumes, np.floor(volumes))
+    )
+    volume_dtype = 'uint32' if fits_uint32 else 'float64'
+    return {
+        'encoding': COLUMNAR_FORMAT,
+        'length': int(days.size),
+        'start_day': int(days[0]) if days.size else None,
+        'date_deltas': _base64(np.diff(days), '<u4'),
+        'prices': _base64(closes, '<f4'),
+        'volumes': _base64(volumes, '<u4' if fits_uint32 else '<f8'),
+        'volume_dtype': volume_dtype
+    }
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy()
+    if isinstance(obj, np.ndarray):
+        # Dtypes or layouts orjson does not write natively, e.g. strings or strided views
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes via orjson; NumPy arrays and scalars are written without converting to Python objects"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
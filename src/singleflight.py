@@ -0,0 +1,47 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one in-flight task
+
+    The first caller for a key starts the work; callers arriving before it
+    finishes await the same task and get the same result or exception. The
+    key is forgotten once the task completes, so later calls start afresh
+    (caching results is left to the caches). A caller that is cancelled
+    does not cancel the shared task.
+    """
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight)
+        }
+
+# Global single-flight groups
+analysis_flight = SingleFlight()  # analyze_stock per ticker
+price_flight = SingleFlight()  # price history downloads per ticker and period
+info_flight = SingleFlight()  # yfinance info lookups per ticker
@@ -11,12 +11,18 @@ document.addEventListener('DOMContentLoaded', function() {
         const data = JSON.parse(event.data);
 
         if (data.type === 'error') {
-            showStatus('error', `Error: ${data.message}`);
+            showStatus('error', data.ticker ? `Error (${data.ticker}): ${data.message}` : `Error: ${data.message}`);
             return;
         }
 
-        if (data.type === 'analysis_result') {
+        if (data.type === 'analysis_metrics') {
             displayResults(data);
+        } else if (data.type === 'analysis_history') {
+            displayHistory(data);
+        } else if (data.type === 'analysis_complete') {
+            const seconds = (data.timing.total_ms / 1000).toFixed(1);
+            const failed = data.errors ? `, ${data.errors} failed` : '';
+            showStatus('info', `Analyzed ${data.count} tickers in ${seconds}s${failed}`);
         }
     };
 
@@ -43,10 +49,44 @@ document.addEventListener('DOMContentLoaded', function() {
 
         ws.send(JSON.stringify({
             type: 'analyze',
-            tickers: tickers
+            tickers: tickers,
+            encoding: 'columnar'
         }));
     };
 
+    function base64ToBuffer(encoded) {
+        const binary = atob(encoded);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return bytes.buffer;
+    }
+
+    function decodePriceHistory(history) {
+        // Plain JSON histories pass through; columnar ones carry base64 typed arrays
+        if (history.encoding !== 'columnar-v1') {
+            return history;
+        }
+
+        const deltas = new Uint32Array(base64ToBuffer(history.date_deltas));
+        const dates = new Array(history.length);
+        let day = history.start_day;
+        for (let i = 0; i < history.length; i++) {
+            if (i > 0) {
+                day += deltas[i - 1];
+            }
+            dates[i] = new Date(day * 86400000).toISOString().slice(0, 10);
+        }
+
+        const VolumeArray = history.volume_dtype === 'uint32' ? Uint32Array : Float64Array;
+        return {
+            dates: dates,
+            prices: new Float32Array(base64ToBuffer(history.prices)),
+            volumes: new VolumeArray(base64ToBuffer(history.volumes))
+        };
+    }
+
     function showStatus(type, message) {
         statusDiv.className = `alert alert-${type === 'error' ? 'danger' : 'info'}`;
         statusDiv.textContent = message;
@@ -121,8 +161,14 @@ document.addEventListener('DOMContentLoaded', function() {
         // Calculate Sharpe ratio (simplified)
         const sharpeRatio = 0.8 - (volatility * 2); // Lower volatility = higher Sharpe
 
+        return {
+            beta: beta.toFixed(2),
+            sharpeRatio: sharpeRatio.toFixed(2)
+        };
+    }
+
+    function calculateMaxDrawdown(prices) {
         // Calculate max drawdown (simplified)
-        const prices = data.data.price_history.prices;
         let maxDrawdown = 0;
         let peak = prices[0];
 
@@ -135,11 +181,7 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         }
 
-        return {
-            beta: beta.toFixed(2),
-            sharpeRatio: sharpeRatio.toFixed(2),
-            maxDrawdown: (maxDrawdown * 100).toFixed(2) + '%'
-        };
+        return (maxDrawdown * 100).toFixed(2) + '%';
     }
 
     function calculateForensicMetrics() {
@@ -208,7 +250,7 @@ document.addEventListener('DOMContentLoaded', function() {
                                     <div class="indicator-item">
                                         <div class="indicator-row">
                                             <span class="indicator-name">Max DD:</span>
-                                            <span class="indicator-value">${riskMetrics.maxDrawdown}</span>
+                                            <span class="indicator-value" id="maxdd-${ticker}">&hellip;</span>
                                         </div>
                                         <div class="indicator-desc">Maximum observed price decline from peak to trough. Lower values are better.</div>
                                     </div>
@@ -329,12 +371,19 @@ document.addEventListener('DOMContentLoaded', function() {
         `;
 
         resultsDiv.appendChild(tickerDiv);
+    }
+
+    function displayHistory(data) {
+        // Metrics arrive first; the chart and drawdown fill in once the price history lands
+        const ticker = data.ticker;
+        const priceHistory = decodePriceHistory(data.data.price_history);
+        document.getElementById(`maxdd-${ticker}`).textContent = calculateMaxDrawdown(priceHistory.prices);
 
         // Create price chart
         // Create volume trace as a bar chart
         const volumeTrace = {
-            x: data.data.price_history.dates,
-            y: data.data.price_history.volumes,
+            x: priceHistory.dates,
+            y: priceHistory.volumes,
             type: 'bar',
             name: 'Volume',
             marker: {
@@ -345,8 +394,8 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // Create price trace as a line chart
         const priceTrace = {
-            x: data.data.price_history.dates,
-            y: data.data.price_history.prices,
+            x: priceHistory.dates,
+            y: priceHistory.prices,
             type: 'scatter',
             name: 'Price',
             line: {
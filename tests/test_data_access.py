@@ -0,0 +1,19 @@
+import asyncio
+import time
+
+from src.data_access import DataAccessLayer, SourceLimits
+
+
+def test_layer_survives_successive_event_loops():
+    # Each CLI run or test gets its own asyncio.run loop; waiting on limits bound to an earlier one must not fail
+    layer = DataAccessLayer(max_workers=4, sources={'test': SourceLimits(max_concurrency=2, rate=1000.0, burst=1)})
+
+    async def calls():
+        return await asyncio.gather(*(layer.run('test', time.sleep, 0.001) for _ in range(20)))
+
+    try:
+        for _ in range(3):
+            assert len(asyncio.run(calls())) == 20
+        assert layer.stats()['test'] == {'calls': 60, 'in_flight': 0, 'timeouts': 0}
+    finally:
+        layer.shutdown()
@@ -0,0 +1,55 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics.indicators import IndicatorState
+from src.cache import indicator_cache
+from src.main import update_indicator_state
+
+
+def _price_data(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    volumes = rng.integers(100_000, 1_000_000, n_bars)
+    return pd.DataFrame({'Close': closes, 'Volume': volumes},
+                        index=pd.date_range('2024-01-02', periods=n_bars, freq='B'))
+
+
+@pytest.fixture
+def fast_thread_switching():
+    # Switch threads often enough for two short updates to interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_updates_match_replay(fast_thread_switching):
+    # Two analyses of one ticker (e.g. json and columnar) catching up the same cached state at once
+    price_data = _price_data(300)
+    expected = IndicatorState.from_history(
+        price_data['Close'].to_numpy(), price_data['Volume'].to_numpy(), price_data.index
+    ).snapshot()
+
+    for _ in range(200):
+        indicator_cache.delete('TEST')
+        update_indicator_state('TEST', price_data.iloc[:-20])
+        barrier = threading.Barrier(2)
+
+        def update():
+            barrier.wait()
+            update_indicator_state('TEST', price_data)
+
+        threads = [threading.Thread(target=update) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        state = indicator_cache.get('TEST')
+        assert state.count == len(price_data)
+        assert state.snapshot() == pytest.approx(expected)
+    indicator_cache.delete('TEST')
@@ -0,0 +1,17 @@
+import numpy as np
+
+from src.analytics.forensic_analyzer import ForensicAnalyzer, RollingAnomalyDetector
+
+
+def test_streaming_zscores_recover_after_nan_like_batch():
+    rng = np.random.default_rng(0)
+    data = rng.normal(0, 1, (300, 3))
+    data[260, 1] = np.nan
+    data[100, 2] = np.nan
+
+    batch = ForensicAnalyzer().detect_anomalies(data, window=20)['z_scores']
+    detector = RollingAnomalyDetector.from_history(data[:20], window=20)
+    streamed = np.array([detector.update(row)['z_scores'] for row in data[20:]])
+
+    np.testing.assert_allclose(streamed, batch[20:], rtol=1e-9, atol=1e-9)
+    assert np.isfinite(streamed[-1]).all()